@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+
+from BoardStyle import COLOR_BACKGROUND, COLOR_OUTLINE, hex_geometry
+from GameBoard import GameBoard
+from Profiler import Histogram
+from SelfPlay import read_records
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:
+    Image = None
+    ImageDraw = None
+
+
+class DifficultyStats:
+    """Running statistics for the games of one difficulty, constant memory"""
+
+    def __init__(self):
+        """Initialize empty statistics"""
+        self.games = 0
+        self.wins = {"walls": 0, "mouse": 0}
+        self.turns = {}
+        self.scores = {}
+        self.ai_times = Histogram()
+        self.table_moves = 0
+        self.wall_heatmap = [[0] * GameBoard.SIZE for _ in range(GameBoard.SIZE)]
+        self.escape_heatmap = [[0] * GameBoard.SIZE for _ in range(GameBoard.SIZE)]
+
+    def add(self, record):
+        """Adds one game record"""
+        self.games += 1
+        winner = record.get("winner")
+        if winner in self.wins:
+            self.wins[winner] += 1
+
+        turns = record.get("turns", 0)
+        self.turns[turns] = self.turns.get(turns, 0) + 1
+        score = record.get("score", 0)
+        self.scores[score] = self.scores.get(score, 0) + 1
+
+        for seconds in record.get("ai_times", ()):
+            self.ai_times.add(seconds)
+        self.table_moves += record.get("table_moves", 0)
+
+        mouse = record.get("start", {}).get("mouse")
+        for kind, r, c in record.get("moves", ()):
+            if kind == "wall":
+                self.wall_heatmap[r][c] += 1
+            else:
+                mouse = (r, c)
+
+        if winner == "mouse" and mouse is not None:
+            r, c = mouse
+            self.escape_heatmap[r][c] += 1
+
+    def to_dict(self):
+        """Makes the statistics into a dictionary for saving into json"""
+        times = self.ai_times
+        return {
+            "games": self.games,
+            "wins": dict(self.wins),
+            "wall_win_rate": self.wins["walls"] / self.games if self.games else 0.0,
+            "turns": {str(k): v for k, v in sorted(self.turns.items())},
+            "turns_mean": _mean(self.turns),
+            "scores": {str(k): v for k, v in sorted(self.scores.items())},
+            "score_mean": _mean(self.scores),
+            "ai_time": {
+                "searched_moves": times.count,
+                "table_moves": self.table_moves,
+                "mean": times.mean(),
+                "p50": times.percentile(50),
+                "p90": times.percentile(90),
+                "p99": times.percentile(99),
+                "max": times.max,
+            },
+            "wall_heatmap": self.wall_heatmap,
+            "escape_heatmap": self.escape_heatmap,
+        }
+
+
+def _mean(distribution):
+    """Returns the mean of a {value: count} distribution"""
+    total = sum(distribution.values())
+    if not total:
+        return 0.0
+    return sum(value * count for value, count in distribution.items()) / total
+
+
+def only_difficulty(records, difficulties):
+    """Filters a record stream down to some difficulties"""
+    for record in records:
+        if record.get("difficulty") in difficulties:
+            yield record
+
+
+def analyze(records):
+    """Consumes a record stream and returns the statistics per difficulty"""
+    stats = {}
+    for record in records:
+        difficulty = record.get("difficulty") or "none"
+        per = stats.get(difficulty)
+        if per is None:
+            per = stats[difficulty] = DifficultyStats()
+        per.add(record)
+    return stats
+
+
+def render_heatmap(counts, path, radius=14):
+    """Writes a heatmap of per-cell counts as a png drawn on the hex board"""
+    if Image is None:
+        raise RuntimeError("PNG heatmaps need Pillow, install it with 'pip install pillow'")
+
+    geometry = hex_geometry(radius, radius + 4, len(counts))
+    image = Image.new("RGB", (geometry.width, geometry.height), COLOR_BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    peak = max((max(row) for row in counts), default=0) or 1
+
+    for (row, col), polygon in geometry.polygons.items():
+        heat = counts[row][col] / peak
+        fill = (255, int(255 * (1 - heat)), int(200 * (1 - heat)))
+        draw.polygon(polygon, fill=fill, outline=COLOR_OUTLINE)
+
+    image.save(path)
+
+
+def main():
+    """Command line entry point for the game analytics"""
+    parser = argparse.ArgumentParser(description="Aggregate statistics over recorded games")
+    parser.add_argument("records", nargs="+", help="json lines record files, .gz allowed, - for stdin")
+    parser.add_argument("--difficulty", nargs="*", default=None, help="only these difficulties")
+    parser.add_argument("--out", default=None, help="json output file, stdout when missing")
+    parser.add_argument("--heatmaps", default=None, help="directory for png heatmaps")
+    args = parser.parse_args()
+    if args.heatmaps and Image is None:
+        parser.error("--heatmaps needs Pillow, install it with 'pip install pillow'")
+
+    records = read_records(args.records)
+    if args.difficulty:
+        records = only_difficulty(records, set(args.difficulty))
+    stats = analyze(records)
+
+    report = {difficulty: per.to_dict() for difficulty, per in sorted(stats.items())}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.heatmaps:
+        os.makedirs(args.heatmaps, exist_ok=True)
+        for difficulty, per in stats.items():
+            render_heatmap(per.wall_heatmap, os.path.join(args.heatmaps, f"walls_{difficulty}.png"))
+            render_heatmap(per.escape_heatmap, os.path.join(args.heatmaps, f"escapes_{difficulty}.png"))
+
+
+if __name__ == "__main__":
+    main()
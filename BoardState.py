@@ -0,0 +1,85 @@
+class BoardState:
+    """Immutable snapshot of a GameBoard position
+
+    Cells are stored as row * SIZE + col indices and the walls as a bitset,
+    so a snapshot is a handful of ints and copying one is free. Successive
+    states share every unchanged field, and the player strings are interned.
+    """
+    __slots__ = ("mouse", "walls", "turn", "score", "current_player", "_hash")
+
+    def __init__(self, mouse, walls, turn, score, current_player):
+        """Initialize the snapshot, it can not be changed afterwards"""
+        object.__setattr__(self, "mouse", mouse)
+        object.__setattr__(self, "walls", walls)
+        object.__setattr__(self, "turn", turn)
+        object.__setattr__(self, "score", score)
+        object.__setattr__(self, "current_player", current_player)
+        object.__setattr__(
+            self, "_hash", hash((mouse, walls, turn, score, current_player))
+        )
+
+    def __setattr__(self, name, value):
+        """Snapshots are frozen"""
+        raise AttributeError("BoardState is immutable")
+
+    def __delattr__(self, name):
+        """Snapshots are frozen"""
+        raise AttributeError("BoardState is immutable")
+
+    def __hash__(self):
+        """Returns the precomputed hash"""
+        return self._hash
+
+    def __eq__(self, other):
+        """Two snapshots are equal when every field is equal"""
+        if not isinstance(other, BoardState):
+            return NotImplemented
+        return (
+            self._hash == other._hash
+            and self.mouse == other.mouse
+            and self.walls == other.walls
+            and self.turn == other.turn
+            and self.score == other.score
+            and self.current_player == other.current_player
+        )
+
+    def __repr__(self):
+        """Debug representation"""
+        return (
+            f"BoardState(mouse={self.mouse}, walls={self.walls:#x}, turn={self.turn}, "
+            f"score={self.score}, current_player={self.current_player!r})"
+        )
+
+    def __reduce__(self):
+        """Pickle support, slots without a writable __setattr__ need it"""
+        return (
+            BoardState,
+            (self.mouse, self.walls, self.turn, self.score, self.current_player),
+        )
+
+    def has_wall(self, index):
+        """Query to see if a cell index holds a wall"""
+        return (self.walls >> index) & 1 == 1
+
+    def wall_count(self):
+        """Returns the number of walls"""
+        return bin(self.walls).count("1")
+
+    def position(self):
+        """Returns the part of the state that decides the rest of the game"""
+        return self.mouse, self.walls, self.current_player
+
+    def with_wall(self, index, score_delta=0, switch=False):
+        """Returns the state with an extra wall, one turn later"""
+        return BoardState(
+            self.mouse,
+            self.walls | (1 << index),
+            self.turn + 1,
+            self.score + score_delta,
+            _other(self.current_player) if switch else self.current_player,
+        )
+
+
+def _other(player):
+    """Returns the other player"""
+    return "mouse" if player == "walls" else "walls"
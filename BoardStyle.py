@@ -0,0 +1,54 @@
+import functools
+import math
+
+from GameBoard import GameBoard
+
+HEX_RADIUS = 28
+PADDING = 50
+DOT_RADIUS = 5
+DOT_COLOR = "#333333"
+COLOR_BACKGROUND = "#9acd32"
+COLOR_SHADOW = "#999999"
+COLOR_EMPTY = "#c8f26d"
+COLOR_WALL = "#8b4513"
+COLOR_MOUSE = "#ff4d4d"
+COLOR_OUTLINE = "#6aa84f"
+
+
+class HexGeometry:
+    """Pixel geometry of the hex board, shared by the game window and the renderer
+
+    Every center and polygon is computed once, so drawing a board only
+    fills precomputed polygons.
+    """
+
+    def __init__(self, radius, padding, size):
+        """Computes the centers and the hex polygons of every cell"""
+        self.radius = radius
+        self.padding = padding
+        self.size = size
+        hex_w = 2 * radius
+        hex_h = math.sqrt(3) * radius
+        self.width = int(2 * padding + (size - 1) * hex_w + hex_w / 2)
+        self.height = int(2 * padding + (size - 1) * hex_h)
+
+        corners = [
+            (radius * math.cos(math.radians(60 * i - 30)), radius * math.sin(math.radians(60 * i - 30)))
+            for i in range(6)
+        ]
+        self.centers = {}
+        self.polygons = {}
+        self.shadows = {}
+        for row in range(size):
+            for col in range(size):
+                x = padding + col * hex_w + (hex_w / 2 if row % 2 == 1 else 0)
+                y = padding + row * hex_h
+                self.centers[(row, col)] = (x, y)
+                self.polygons[(row, col)] = [(x + dx, y + dy) for dx, dy in corners]
+                self.shadows[(row, col)] = [(x + dx + 2, y + dy + 2) for dx, dy in corners]
+
+
+@functools.lru_cache(maxsize=None)
+def hex_geometry(radius=HEX_RADIUS, padding=PADDING, size=GameBoard.SIZE):
+    """Returns the shared geometry for a radius, padding and board size"""
+    return HexGeometry(radius, padding, size)
@@ -1,26 +1,38 @@
 import random
+import sys
+from collections import deque
+
+from BoardState import BoardState
+from PolicyTable import PolicyTable, position_key
+from Profiler import PROFILER
 
 
 class GameBoard:
     """GameBoard class , the engine of the game"""
     SIZE = 11
+    AI_VERSION = 1
+    POLICY_DIR = "policies"
 
-    def __init__(self, game_type, difficulty=None):
-        """Initialize the game board"""
+    def __init__(self, game_type, difficulty=None, init_walls=True):
+        """Initialize the game board, with the random starting walls unless init_walls is False"""
         self.game_type = game_type
         self.difficulty = difficulty
         self.turn = 0
         self.current_player = "walls"
         self.score = 20000
-        self.mouse_pos = (self.SIZE // 2, self.SIZE // 2)
+        self._mouse_pos = (self.SIZE // 2, self.SIZE // 2)
         self.walls = set()
-        self._init_walls()
+        if init_walls:
+            self._init_walls()
+        self._rebuild_legal_moves()
         self.undo_stack = []
         self.redo_stack = []
+        self.reply_cache = None
+        self.search_profile = "search"
 
     def save_state(self):
         """Save the game board state"""
-        self.undo_stack.append(self.to_dict())
+        self.undo_stack.append(self.to_state())
         self.redo_stack.clear()
 
     def undo(self):
@@ -28,9 +40,8 @@ class GameBoard:
         if not self.undo_stack:
             return False
 
-        self.redo_stack.append(self.to_dict())
-        state = self.undo_stack.pop()
-        self._restore_from_dict(state)
+        self.redo_stack.append(self.to_state())
+        self.load_state(self.undo_stack.pop())
         return True
 
     def redo(self):
@@ -38,13 +49,57 @@ class GameBoard:
         if not self.redo_stack:
             return False
 
-        self.undo_stack.append(self.to_dict())
-        state = self.redo_stack.pop()
-        self._restore_from_dict(state)
+        self.undo_stack.append(self.to_state())
+        self.load_state(self.redo_stack.pop())
         return True
 
 
 
+    @property
+    def mouse_pos(self):
+        """The mouse position"""
+        return self._mouse_pos
+
+    @mouse_pos.setter
+    def mouse_pos(self, pos):
+        """Moves the mouse and updates the legal move sets"""
+        old = self._mouse_pos
+        self._mouse_pos = pos
+        if old != pos:
+            if old not in self.walls:
+                self._legal_walls.add(old)
+            self._legal_walls.discard(pos)
+        self._legal_mouse_moves = set(self.get_neighbors())
+
+    def _rebuild_legal_moves(self):
+        """Recomputes the wall bitset and legal move sets from scratch"""
+        self._wall_bits = 0
+        for pos in self.walls:
+            self._wall_bits |= 1 << self.index_of(pos)
+        self._legal_walls = {
+            (r, c)
+            for r in range(self.SIZE)
+            for c in range(self.SIZE)
+            if (r, c) not in self.walls and (r, c) != self._mouse_pos
+        }
+        self._legal_mouse_moves = set(self.get_neighbors())
+
+    def legal_wall_moves(self):
+        """Returns the set of cells a wall can be placed on, kept up to date, do not modify it"""
+        return self._legal_walls
+
+    def legal_mouse_moves(self):
+        """Returns the set of cells the mouse can move to, kept up to date, do not modify it"""
+        return self._legal_mouse_moves
+
+    def is_legal_wall(self, pos):
+        """Query to see if a wall can be placed on a position"""
+        return pos in self._legal_walls
+
+    def is_legal_mouse_move(self, pos):
+        """Query to see if the mouse can move to a position"""
+        return pos in self._legal_mouse_moves
+
     def _init_walls(self):
         """Initializing the walls"""
         if self.difficulty == "easy":
@@ -87,14 +142,18 @@ class GameBoard:
         """Switch the current_player"""
         self.current_player = "mouse" if self.current_player == "walls" else "walls"
 
+    @PROFILER.timed("engine.place_wall")
     def place_wall(self, pos):
         """Place a wall on the board"""
         if self.game_type == "1vs1" and not self.is_wall_turn():
             return False
 
-        if self.is_free(pos) and pos != self.mouse_pos:
+        if pos in self._legal_walls:
             self.save_state()
             self.walls.add(pos)
+            self._wall_bits |= 1 << self.index_of(pos)
+            self._legal_walls.discard(pos)
+            self._legal_mouse_moves.discard(pos)
             self.score -= 50
             self.turn += 1
 
@@ -109,7 +168,7 @@ class GameBoard:
         if self.game_type == "1vs1" and not self.is_mouse_turn():
             return False
 
-        if new_pos in self.get_neighbors():
+        if new_pos in self._legal_mouse_moves:
             self.save_state()
             self.mouse_pos = new_pos
             self.turn += 1
@@ -130,9 +189,40 @@ class GameBoard:
         r, c = pos
         return r == 0 or c == 0 or r == self.SIZE - 1 or c == self.SIZE - 1
 
+    def hex_distance(self, a, b):
+        """Returns the number of steps between two cells, ignoring walls"""
+        (r1, c1), (r2, c2) = a, b
+        x1 = c1 - (r1 - (r1 & 1)) // 2
+        x2 = c2 - (r2 - (r2 & 1)) // 2
+        dx, dz = x1 - x2, r1 - r2
+        return max(abs(dx), abs(dz), abs(dx + dz))
+
+    def shortest_route(self, pos=None):
+        """Returns the cells of a shortest path from a position to the margin, without the start"""
+        if pos is None:
+            pos = self.mouse_pos
+
+        parents = {pos: None}
+        queue = deque([pos])
+        while queue:
+            current = queue.popleft()
+            if self.mouse_escaped_pos(current):
+                route = []
+                while current != pos:
+                    route.append(current)
+                    current = parents[current]
+                route.reverse()
+                return route
+
+            for n in self.get_neighbors(current):
+                if n not in parents:
+                    parents[n] = current
+                    queue.append(n)
+        return []
+
     def mouse_trapped(self):
         """Querry to see if the mouse escaped"""
-        return len(self.get_neighbors()) == 0
+        return not self._legal_mouse_moves
 
     def get_neighbors(self, pos=None):
         """Returns the neighbors of the current position if they are not walls """
@@ -153,6 +243,7 @@ class GameBoard:
                 neighbors.append(nxt)
         return neighbors
 
+    @PROFILER.timed("engine.move_mouse_ai")
     def move_mouse_ai(self):
         """Move the mouse ai , separates the game difficulty"""
         if self.game_type != "singleplayer":
@@ -160,33 +251,84 @@ class GameBoard:
 
         self.save_state()
 
-        if self.difficulty == "easy":
-            self.move_greedy()
-        elif self.difficulty == "medium":
-            self.move_bfs()
-        elif self.difficulty == "hard":
-            self.move_astar()
+        found, step = self._cached_step()
+        if not found:
+            step = self.ai_step()
+        if step is not None:
+            self.mouse_pos = step
 
         self.turn += 1
 
+    def ai_step(self):
+        """Returns the cell the mouse ai of the difficulty moves to, None if it stays"""
+        if self.difficulty == "easy":
+            return self.greedy_step()
+        if self.difficulty == "medium":
+            return self.bfs_step()
+        if self.difficulty == "hard":
+            return self.astar_step()
+        return None
+
+    def _cached_step(self):
+        """Looks the mouse ai move up in the reply cache filled by pondering, returns (found, step)"""
+        if self.reply_cache is None:
+            return False, None
+
+        found, step = self.reply_cache.get(self.to_state().position())
+        if not found or (step is not None and step not in self._legal_mouse_moves):
+            PROFILER.count("engine.reply_cache_miss")
+            return False, None
+
+        PROFILER.count("engine.reply_cache_hit")
+        return True, step
+
+    def policy_step(self, table):
+        """Looks the mouse ai move up in a precomputed policy table, returns (found, step)"""
+        index = table.lookup(position_key(self.to_state()))
+        if index is None:
+            PROFILER.count("engine.policy_miss")
+            return False, None
+        if index == PolicyTable.STAY:
+            step = None
+        else:
+            step = self.pos_of(index)
+            if step not in self._legal_mouse_moves:
+                PROFILER.count("engine.policy_miss")
+                return False, None
+
+        PROFILER.count("engine.policy_hit")
+        return True, step
+
     def move_greedy(self):
         """Move the game difficulty easy , using greedy , shortest path to margin"""
+        step = self.greedy_step()
+        if step is not None:
+            self.mouse_pos = step
+
+    def greedy_step(self):
+        """Returns the neighbor closest to the margin, None if the mouse can not move"""
         moves = self.get_neighbors()
         if not moves:
-            return
+            return None
 
         def dist_to_edge(p):
             """Returns minimum distance from the mouse to the margin"""
             r, c = p
             return min(r, c, self.SIZE - 1 - r, self.SIZE - 1 - c)
 
-        self.mouse_pos = min(moves, key=dist_to_edge)
+        return min(moves, key=dist_to_edge)
 
     def _fallback_move(self):
         """Fallback move for bfs and a* when mouse is entrapped but still able to move, maximizez lifetime"""
+        step = self._fallback_step()
+        if step is not None:
+            self.mouse_pos = step
+
+    def _fallback_step(self):
+        """Returns the neighbor where the mouse survives the longest, None if it can not move"""
         neighbors = self.get_neighbors()
         if not neighbors:
-            return
+            return None
 
         def survival_score(pos):
             """Kind of an heuristic for surviving most"""
@@ -196,28 +338,43 @@ class GameBoard:
                     + len(self.get_neighbors(pos)) * 2
             )
 
-        self.mouse_pos = max(neighbors, key=survival_score)
+        return max(neighbors, key=survival_score)
 
     def move_bfs(self):
         """Move the game difficulty easy , using BFS, takes the first step from the first path to exit found"""
+        step = self.bfs_step()
+        if step is not None:
+            self.mouse_pos = step
+
+    def bfs_step(self):
+        """Returns the first step of the first path to exit found by BFS, None if the mouse stays"""
         start = self.mouse_pos
         queue = [(start, [])]
         visited = {start}
+        profiling = PROFILER.enabled
+        nodes = 0
+        max_open = 1
 
         while queue:
             current, path = queue.pop(0)
+            if profiling:
+                nodes += 1
 
             if self.mouse_escaped_pos(current):
-                if path:
-                    self.mouse_pos = path[0]
-                return
+                if profiling:
+                    PROFILER.record_search(self.search_profile + ".bfs", nodes, max_open)
+                return path[0] if path else None
 
             for n in self.get_neighbors(current):
                 if n not in visited:
                     visited.add(n)
                     queue.append((n, path + [n]))
+            if profiling:
+                max_open = max(max_open, len(queue))
 
-        self._fallback_move()
+        if profiling:
+            PROFILER.record_search(self.search_profile + ".bfs", nodes, max_open)
+        return self._fallback_step()
 
     def _distance_to_edge(self, pos):
         """Returns the distance to the edge of the given position"""
@@ -249,18 +406,29 @@ class GameBoard:
 
     def move_astar(self):
         """"Move the game difficulty easy , using A* """
+        step = self.astar_step()
+        if step is not None:
+            self.mouse_pos = step
+
+    def astar_step(self):
+        """Returns the first step of the path to exit found by A*, None if the mouse stays"""
         start = self.mouse_pos
         open_list = [(self._heuristic(start), 0, start, [])]
         visited = {}
+        profiling = PROFILER.enabled
+        nodes = 0
+        max_open = 1
 
         while open_list:
             open_list.sort(key=lambda x: x[0])
             f, g, current, path = open_list.pop(0)
+            if profiling:
+                nodes += 1
 
             if self.mouse_escaped_pos(current):
-                if path:
-                    self.mouse_pos = path[0]
-                return
+                if profiling:
+                    PROFILER.record_search(self.search_profile + ".astar", nodes, max_open)
+                return path[0] if path else None
 
             if current in visited and visited[current] <= g:
                 continue
@@ -271,8 +439,12 @@ class GameBoard:
                 ng = g + 1
                 nf = ng + self._heuristic(n)
                 open_list.append((nf, ng, n, path + [n]))
+            if profiling:
+                max_open = max(max_open, len(open_list))
 
-        self._fallback_move()
+        if profiling:
+            PROFILER.record_search(self.search_profile + ".astar", nodes, max_open)
+        return self._fallback_step()
 
 
     def to_dict(self):
@@ -290,7 +462,7 @@ class GameBoard:
     @staticmethod
     def from_dict(data):
         """parses a GameBoard object from json into a GameBoard object"""
-        board = GameBoard(data["game_type"], data["difficulty"])
+        board = GameBoard(data["game_type"], data["difficulty"], init_walls=False)
         board._restore_from_dict(data)
         return board
 
@@ -300,6 +472,53 @@ class GameBoard:
         self.difficulty = data["difficulty"]
         self.turn = data["turn"]
         self.current_player = data["current_player"]
-        self.mouse_pos = tuple(data["mouse_pos"])
+        self._mouse_pos = tuple(data["mouse_pos"])
         self.walls = set(tuple(w) for w in data["walls"])
         self.score = data["score"]
+        self._rebuild_legal_moves()
+
+    def index_of(self, pos):
+        """Returns the cell index used by BoardState for a position"""
+        r, c = pos
+        return r * self.SIZE + c
+
+    def pos_of(self, index):
+        """Returns the position of a BoardState cell index"""
+        return divmod(index, self.SIZE)
+
+    def to_state(self):
+        """Makes a GameBoard object into an immutable BoardState snapshot"""
+        return BoardState(
+            self.index_of(self.mouse_pos),
+            self._wall_bits,
+            self.turn,
+            self.score,
+            sys.intern(self.current_player),
+        )
+
+    def load_state(self, state):
+        """Restores the position of a BoardState snapshot, touching only the cells that differ"""
+        changed = self._wall_bits ^ state.walls
+        while changed:
+            low = changed & -changed
+            pos = self.pos_of(low.bit_length() - 1)
+            if state.walls & low:
+                self.walls.add(pos)
+                self._legal_walls.discard(pos)
+            else:
+                self.walls.discard(pos)
+                if pos != self._mouse_pos:
+                    self._legal_walls.add(pos)
+            changed ^= low
+        self._wall_bits = state.walls
+        self.mouse_pos = self.pos_of(state.mouse)
+        self.turn = state.turn
+        self.score = state.score
+        self.current_player = state.current_player
+
+    @staticmethod
+    def from_state(state, game_type, difficulty=None):
+        """Builds a GameBoard object from a BoardState snapshot"""
+        board = GameBoard(game_type, difficulty, init_walls=False)
+        board.load_state(state)
+        return board
@@ -4,31 +4,48 @@ from tkinter import ttk
 import math
 import json
 
+import BoardStyle
+from Ponder import Ponderer
+from Profiler import PROFILER
+
 
 class GameBoardUI(tk.Frame):
     """Game Board UI Frame """
-    HEX_RADIUS = 28
-    PADDING = 50
+    HEX_RADIUS = BoardStyle.HEX_RADIUS
+    PADDING = BoardStyle.PADDING
     SAVE_FILE = "saves.json"
-    DOT_RADIUS = 5
-    DOT_COLOR = "#333333"
-    COLOR_EMPTY = "#c8f26d"
-    COLOR_WALL = "#8b4513"
-    COLOR_MOUSE = "#ff4d4d"
-    COLOR_OUTLINE = "#6aa84f"
+    DOT_RADIUS = BoardStyle.DOT_RADIUS
+    DOT_COLOR = BoardStyle.DOT_COLOR
+    COLOR_BACKGROUND = BoardStyle.COLOR_BACKGROUND
+    COLOR_SHADOW = BoardStyle.COLOR_SHADOW
+    COLOR_EMPTY = BoardStyle.COLOR_EMPTY
+    COLOR_WALL = BoardStyle.COLOR_WALL
+    COLOR_MOUSE = BoardStyle.COLOR_MOUSE
+    COLOR_OUTLINE = BoardStyle.COLOR_OUTLINE
     COLOR_HOVER = "#ffd966"
     COLOR_WALL_HOVER = "#93c47d"
+    PREVIEW_COLOR = "#cc0000"
+    PREVIEW_DELAY = 60
+    OVERLAY_COLOR = "#1e1e1e"
+    OVERLAY_TEXT_COLOR = "#f0f0f0"
 
     def __init__(self, master, board):
         """Constructor"""
-        super().__init__(master, bg="#9acd32")
+        super().__init__(master, bg=self.COLOR_BACKGROUND)
         self.board = board
         self.hovered_cell = None
+        self.show_preview = tk.BooleanVar(value=False)
+        self._preview_job = None
+
+        self.ponderer = None
+        if self.board.game_type == "singleplayer":
+            self.ponderer = Ponderer()
+            self.board.reply_cache = self.ponderer.cache
 
-        self.main = tk.Frame(self, bg="#9acd32")
+        self.main = tk.Frame(self, bg=self.COLOR_BACKGROUND)
         self.main.pack(fill="both", expand=True)
 
-        self.canvas = tk.Canvas(self.main, bg="#9acd32", width=600, highlightthickness=0)
+        self.canvas = tk.Canvas(self.main, bg=self.COLOR_BACKGROUND, width=600, highlightthickness=0)
         self.canvas.pack(side="left", fill="both", expand=True)
         style = ttk.Style()
         style.theme_use("aqua")
@@ -49,15 +66,59 @@ class GameBoardUI(tk.Frame):
 
         self._build_side_panel()
 
-        self.hex_h = math.sqrt(3) * self.HEX_RADIUS
-        self.hex_w = 2 * self.HEX_RADIUS
+        self.geometry = BoardStyle.hex_geometry(self.HEX_RADIUS, self.PADDING, self.board.SIZE)
 
         self.canvas.bind("<Button-1>", self.on_click)
         self.canvas.bind("<Motion>", self.on_hover)
         self.canvas.bind("<Leave>", self.clear_hover)
+        self.master.bind("<F3>", self.toggle_profiler)
+        self.master.bind("<F4>", self.export_profile)
+
+        self.draw_board()
 
+    def destroy(self):
+        """Unbinds the profiler keys, cancels the preview refresh and stops pondering before destroying the frame"""
+        self.master.unbind("<F3>")
+        self.master.unbind("<F4>")
+        if self._preview_job is not None:
+            self.after_cancel(self._preview_job)
+            self._preview_job = None
+        if self.ponderer is not None:
+            self.ponderer.stop()
+            self.board.reply_cache = None
+        super().destroy()
+
+    def toggle_profiler(self, event=None):
+        """Key handler switching the profiler and its overlay on or off"""
+        PROFILER.toggle()
         self.draw_board()
 
+    def export_profile(self, event=None):
+        """Key handler exporting the session profile to json and csv"""
+        if PROFILER.enabled:
+            PROFILER.export()
+
+    def draw_profile_overlay(self):
+        """Draws the live profiler overlay on top of the board"""
+        lines = PROFILER.overlay_lines() or ["profiler on, no samples yet"]
+        text = self.canvas.create_text(
+            8,
+            8,
+            text="\n".join(lines),
+            anchor="nw",
+            font=("Courier", 9),
+            fill=self.OVERLAY_TEXT_COLOR,
+            tags="profile",
+        )
+        x1, y1, x2, y2 = self.canvas.bbox(text)
+        background = self.canvas.create_rectangle(
+            x1 - 4, y1 - 4, x2 + 4, y2 + 4,
+            fill=self.OVERLAY_COLOR,
+            outline="",
+            tags="profile",
+        )
+        self.canvas.tag_lower(background, text)
+
     def _build_side_panel(self):
         """Build the side panel for the game board , info game ,redo/undo/exit buttons"""
         ttk.Label(self.side, text="Game Info", font=("Arial", 16, "bold")).pack(pady=10)
@@ -67,6 +128,14 @@ class GameBoardUI(tk.Frame):
 
         self.score = ttk.Label(self.side)
         self.score.pack(pady=5)
+
+        if self.board.game_type == "singleplayer":
+            ttk.Checkbutton(
+                self.side,
+                text="Preview mouse reply",
+                variable=self.show_preview,
+                command=self.draw_board
+            ).pack(pady=5)
         tk.Frame(self.side, bg="#323131").pack(expand=True, fill="both")
 
         ttk.Button(
@@ -172,6 +241,7 @@ class GameBoardUI(tk.Frame):
             )
         ).pack(pady=10)
 
+    @PROFILER.timed("ui.save")
     def _save_with_name(self, name, modal, exit_after):
         """Save game function"""
         if not name.strip():
@@ -200,26 +270,22 @@ class GameBoardUI(tk.Frame):
             self.hovered_cell = None
             self.draw_board()
 
+    @PROFILER.timed("ui.draw_board")
     def draw_board(self):
         """Draw the game board"""
         self.canvas.delete("all")
 
-        valid_mouse_moves = []
-        valid_wall_moves = []
+        valid_mouse_moves = frozenset()
+        valid_wall_moves = frozenset()
 
         if self.board.game_type == "1vs1" and self.board.is_mouse_turn():
-            valid_mouse_moves = self.board.get_neighbors()
+            valid_mouse_moves = self.board.legal_mouse_moves()
 
         if (
                 self.board.game_type == "singleplayer"
                 or (self.board.game_type == "1vs1" and self.board.is_wall_turn())
         ):
-            valid_wall_moves = [
-                (r, c)
-                for r in range(self.board.SIZE)
-                    for c in range(self.board.SIZE)
-                        if self.board.is_free((r, c)) and (r, c) != self.board.mouse_pos
-            ]
+            valid_wall_moves = self.board.legal_wall_moves()
 
         for row in range(self.board.SIZE):
             for col in range(self.board.SIZE):
@@ -234,8 +300,8 @@ class GameBoardUI(tk.Frame):
                     color = self.COLOR_WALL_HOVER
                 else:
                     color = self.COLOR_EMPTY
-                self.draw_hex(cx + 2, cy + 2, self.HEX_RADIUS, "#999999")
-                self.draw_hex(cx, cy, self.HEX_RADIUS, color)
+                self.draw_hex(self.geometry.shadows[cell], self.COLOR_SHADOW)
+                self.draw_hex(self.geometry.polygons[cell], color)
                 if cell == self.board.mouse_pos:
                     self.canvas.create_text(
                         cx,
@@ -259,15 +325,43 @@ class GameBoardUI(tk.Frame):
                     )
         self.update_info()
 
-    def draw_hex(self, cx, cy, r, fill):
-        """Draws a hex cell"""
-        points = []
-        for i in range(6):
-            angle = math.radians(60 * i - 30)
-            x = cx + r * math.cos(angle)
-            y = cy + r * math.sin(angle)
-            points.extend([x, y])
+        if self.ponderer is not None:
+            self.ponderer.ponder(self.board)
+            if self.show_preview.get() and self.hovered_cell in valid_wall_moves:
+                self.draw_preview()
 
+        if PROFILER.enabled:
+            self.draw_profile_overlay()
+
+    def draw_preview(self):
+        """Marks where the mouse would go if a wall was placed on the hovered cell"""
+        found, step = self.ponderer.lookup(self.board, self.hovered_cell)
+        if not found:
+            if self._preview_job is None:
+                self._preview_job = self.after(self.PREVIEW_DELAY, self._refresh_preview)
+            return
+        if step is None:
+            return
+
+        cx, cy = self.hex_center(*step)
+        r = self.HEX_RADIUS / 2
+        self.canvas.create_oval(
+            cx - r,
+            cy - r,
+            cx + r,
+            cy + r,
+            outline=self.PREVIEW_COLOR,
+            width=3
+        )
+
+    def _refresh_preview(self):
+        """Redraws the board once the hovered reply may have been pondered"""
+        self._preview_job = None
+        if self.show_preview.get() and self.hovered_cell is not None:
+            self.draw_board()
+
+    def draw_hex(self, points, fill):
+        """Draws a hex cell from its precomputed corner points"""
         self.canvas.create_polygon(
             points,
             fill=fill,
@@ -277,13 +371,7 @@ class GameBoardUI(tk.Frame):
 
     def hex_center(self, row, col):
         """Returns the center of the hex cell"""
-        x = self.PADDING + col * self.hex_w
-        y = self.PADDING + row * self.hex_h
-
-        if row % 2 == 1:
-            x += self.hex_w / 2
-
-        return x, y
+        return self.geometry.centers[(row, col)]
 
     def on_click(self, event):
         """Event handler for click event"""
@@ -324,7 +412,7 @@ class GameBoardUI(tk.Frame):
                     self.draw_board()
                     self.master.show_win_scene()
                     return
-                if pos in self.board.get_neighbors():
+                if self.board.is_legal_mouse_move(pos):
                     self.board.move_mouse(pos)
                     if self.board.mouse_escaped():
                         self.draw_board()
@@ -332,6 +420,7 @@ class GameBoardUI(tk.Frame):
                         return
                     self.draw_board()
 
+    @PROFILER.timed("ui.pixel_to_hex")
     def pixel_to_hex(self, x, y):
         """Returns the hex cell coordinate based on pixel coordinate"""
         for row in range(self.board.SIZE):
@@ -0,0 +1,224 @@
+import argparse
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+
+
+SAMPLE_POLICIES = ("near_mouse", "block_route")
+
+
+def position_key(state):
+    """Returns the 64 bit key of a BoardState position, stable across runs"""
+    data = state.mouse.to_bytes(2, "little") + state.walls.to_bytes(32, "little")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class _Records:
+    """Sequence view over the sorted records of a mapped table, for bisect"""
+
+    def __init__(self, table):
+        """Initialize the view"""
+        self.table = table
+
+    def __len__(self):
+        """Returns the number of records"""
+        return self.table.count
+
+    def __getitem__(self, i):
+        """Returns the key of the i-th record"""
+        offset = PolicyTable.HEADER.size + i * PolicyTable.RECORD.size
+        return PolicyTable.RECORD.unpack_from(self.table.map, offset)[0]
+
+
+class PolicyTable:
+    """Sorted on-disk table of precomputed mouse ai moves, read through mmap
+
+    The file is a header followed by fixed size (key, cell index) records
+    sorted by key, so a lookup is a binary search over the mapped file and
+    the table is never loaded into memory.
+
+    Positions are keyed exactly and random starting walls make almost every
+    game unique, so the table is a replay cache: it answers the self-play
+    games of the seed range it was built from, and interactive games never
+    consult it.
+    """
+    MAGIC = b"TTMP"
+    FORMAT_VERSION = 1
+    HEADER = struct.Struct("<4sHHH8sQ")
+    RECORD = struct.Struct("<QB")
+    STAY = 255
+
+    _loaded = {}
+
+    def __init__(self, path):
+        """Maps the table file and reads its header"""
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is empty")
+
+        if len(self.map) < self.HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a policy table")
+
+        magic, fmt, ai_version, size, difficulty, count = self.HEADER.unpack_from(self.map, 0)
+        if magic != self.MAGIC or len(self.map) != self.HEADER.size + count * self.RECORD.size:
+            self.close()
+            raise ValueError(f"{path} is not a policy table")
+
+        self.format_version = fmt
+        self.ai_version = ai_version
+        self.size = size
+        self.difficulty = difficulty.rstrip(b"\0").decode()
+        self.count = count
+        self._keys = _Records(self)
+
+    def close(self):
+        """Unmaps the table and closes the file"""
+        if getattr(self, "map", None) is not None:
+            self.map.close()
+            self.map = None
+        self._file.close()
+
+    def is_current(self, difficulty, ai_version, size):
+        """Query to see if the table was built by the current ai for this board"""
+        return (
+            self.format_version == self.FORMAT_VERSION
+            and self.ai_version == ai_version
+            and self.size == size
+            and self.difficulty == difficulty
+        )
+
+    def lookup(self, key):
+        """Returns the stored cell index for a position key, None on a miss"""
+        i = bisect.bisect_left(self._keys, key)
+        if i == self.count:
+            return None
+        found, index = self.RECORD.unpack_from(self.map, self.HEADER.size + i * self.RECORD.size)
+        return index if found == key else None
+
+    @staticmethod
+    def path_for(directory, difficulty):
+        """Returns the table file of a difficulty"""
+        return os.path.join(directory, f"policy_{difficulty}.bin")
+
+    @classmethod
+    def for_difficulty(cls, directory, difficulty, ai_version, size):
+        """Returns the mapped table of a difficulty, None when it is missing or stale"""
+        cache_key = (directory, difficulty, ai_version, size)
+        if cache_key in cls._loaded:
+            return cls._loaded[cache_key]
+
+        table = None
+        path = cls.path_for(directory, difficulty)
+        if os.path.exists(path):
+            try:
+                table = cls(path)
+            except (OSError, ValueError):
+                table = None
+            if table is not None and not table.is_current(difficulty, ai_version, size):
+                table.close()
+                table = None
+
+        cls._loaded[cache_key] = table
+        return table
+
+    @classmethod
+    def forget(cls):
+        """Closes every mapped table so the next lookup maps the files again"""
+        for table in cls._loaded.values():
+            if table is not None:
+                table.close()
+        cls._loaded.clear()
+
+    @classmethod
+    def write(cls, path, difficulty, ai_version, size, moves):
+        """Writes a {key: cell index} mapping as a sorted table file"""
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(cls.HEADER.pack(
+                cls.MAGIC, cls.FORMAT_VERSION, ai_version, size,
+                difficulty.encode(), len(moves),
+            ))
+            for key in sorted(moves):
+                f.write(cls.RECORD.pack(key, moves[key]))
+        os.replace(tmp, path)
+
+
+def sample_positions(difficulty, games, seed=0, policies=SAMPLE_POLICIES):
+    """Yields (key, cell index) for every position of the self-play games of a seed range
+
+    The games are the ones SelfPlay.play_game plays for these seeds and
+    wall policies, so replaying the same seeds with the table hits it on
+    every move.
+    """
+    from SelfPlay import WALL_POLICIES, board_at_start, play_game
+
+    for policy in policies:
+        for i in range(games):
+            record = play_game(difficulty, WALL_POLICIES[policy], seed + i)
+            board = board_at_start(record)
+            moves = record["moves"]
+            for j, (kind, r, c) in enumerate(moves):
+                if kind != "wall":
+                    board.mouse_pos = (r, c)
+                    continue
+                board.place_wall((r, c))
+                following = moves[j + 1] if j + 1 < len(moves) else None
+                if following is not None and following[0] == "mouse":
+                    index = board.index_of((following[1], following[2]))
+                else:
+                    index = PolicyTable.STAY
+                yield position_key(board.to_state()), index
+
+
+def build(difficulty, games, directory=None, seed=0, force=False):
+    """Builds the table of a difficulty unless a current one exists, returns its path"""
+    from GameBoard import GameBoard
+
+    directory = directory or GameBoard.POLICY_DIR
+    path = PolicyTable.path_for(directory, difficulty)
+    PolicyTable.forget()
+
+    if not force and os.path.exists(path):
+        try:
+            table = PolicyTable(path)
+        except (OSError, ValueError):
+            table = None
+        if table is not None:
+            current = table.is_current(difficulty, GameBoard.AI_VERSION, GameBoard.SIZE)
+            table.close()
+            if current:
+                return path
+
+    moves = {}
+    for key, index in sample_positions(difficulty, games, seed):
+        moves[key] = index
+
+    os.makedirs(directory, exist_ok=True)
+    PolicyTable.write(path, difficulty, GameBoard.AI_VERSION, GameBoard.SIZE, moves)
+    return path
+
+
+def main():
+    """Command line entry point for building policy tables"""
+    parser = argparse.ArgumentParser(description="Build the precomputed mouse policy tables")
+    parser.add_argument("difficulty", nargs="*", default=["easy", "medium", "hard"])
+    parser.add_argument("--games", type=int, default=2000, help="self-play seeds covered per difficulty and wall policy")
+    parser.add_argument("--dir", default=None, help="output directory")
+    parser.add_argument("--seed", type=int, default=0, help="first self-play seed to cover")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the table is current")
+    args = parser.parse_args()
+
+    for difficulty in args.difficulty:
+        path = build(difficulty, args.games, args.dir, args.seed, args.force)
+        print(f"{difficulty}: {path}")
+
+
+if __name__ == "__main__":
+    main()
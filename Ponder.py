@@ -0,0 +1,179 @@
+import threading
+from collections import OrderedDict
+
+from GameBoard import GameBoard
+from Profiler import PROFILER
+
+
+class ReplyCache:
+    """Bounded least recently used cache of mouse ai replies keyed by position"""
+
+    def __init__(self, capacity=4096):
+        """Initialize an empty cache"""
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Returns the number of cached replies"""
+        return len(self._entries)
+
+    def get(self, key):
+        """Returns (found, step) for a position"""
+        with self._lock:
+            if key not in self._entries:
+                return False, None
+            self._entries.move_to_end(key)
+            return True, self._entries[key]
+
+    def put(self, key, step):
+        """Stores the reply of a position, evicting the least recently used one when full"""
+        with self._lock:
+            self._entries[key] = step
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drops every cached reply"""
+        with self._lock:
+            self._entries.clear()
+
+
+class Ponderer:
+    """Background worker computing the mouse ai reply to likely walls while the player thinks
+
+    Candidate walls are the legal cells closest to the mouse's current
+    shortest route, and a hovered cell jumps ahead of them. Replies go to a
+    ReplyCache keyed by the position after the wall, which GameBoard checks
+    before running the ai itself.
+    """
+    WALL_SCORE = -50
+
+    def __init__(self, cache=None, depth=40):
+        """Initialize and start the worker thread"""
+        self.cache = cache if cache is not None else ReplyCache()
+        self.depth = depth
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._generation = 0
+        self._base = None
+        self._difficulty = None
+        self._order = None
+        self._priority = []
+        self._thread = threading.Thread(target=self._run, name="ponder", daemon=True)
+        self._thread.start()
+
+    def ponder(self, board):
+        """Starts pondering the position of a board, a no-op when it is already being pondered"""
+        if board.game_type != "singleplayer" or not board.is_wall_turn():
+            return
+        state = board.to_state()
+        with self._cond:
+            if self._base == state and self._difficulty == board.difficulty:
+                return
+            self._generation += 1
+            self._base = state
+            self._difficulty = board.difficulty
+            self._order = None
+            self._priority = []
+            self._cond.notify()
+
+    def reply_key(self, board, pos):
+        """Returns the cache key of the position after a wall on pos"""
+        return board.to_state().with_wall(board.index_of(pos), self.WALL_SCORE).position()
+
+    def lookup(self, board, pos):
+        """Returns (found, step) for the mouse reply to a wall on pos, asking for it first on a miss"""
+        found, step = self.cache.get(self.reply_key(board, pos))
+        if not found:
+            self.prioritize(pos)
+        return found, step
+
+    def prioritize(self, pos):
+        """Moves a candidate wall to the front of the queue"""
+        with self._cond:
+            if pos not in self._priority:
+                self._priority.append(pos)
+                self._cond.notify()
+
+    def stop(self):
+        """Stops the worker thread"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _has_work(self):
+        """Query to see if there is anything left to ponder, call with the lock held"""
+        if self._base is None:
+            return False
+        return bool(self._priority) or self._order is None or bool(self._order)
+
+    def _candidates(self, board):
+        """Returns the legal walls ordered by distance to the mouse's shortest route"""
+        route = board.shortest_route() or [board.mouse_pos]
+
+        def distance(pos):
+            """Distance to the closest route cell, then to the mouse"""
+            return (
+                min(board.hex_distance(pos, cell) for cell in route),
+                board.hex_distance(pos, board.mouse_pos),
+                pos,
+            )
+
+        return sorted(board.legal_wall_moves(), key=distance)[:self.depth]
+
+    def _run(self):
+        """Worker loop"""
+        scratch = None
+        while True:
+            with self._cond:
+                while not self._stopped and not self._has_work():
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                generation = self._generation
+                base = self._base
+                difficulty = self._difficulty
+                order = self._order
+
+            if scratch is None or scratch.difficulty != difficulty:
+                scratch = GameBoard.from_state(base, "singleplayer", difficulty)
+                scratch.search_profile = "ponder.search"
+
+            if order is None:
+                scratch.load_state(base)
+                order = self._candidates(scratch)
+                with self._cond:
+                    if generation != self._generation:
+                        continue
+                    self._order = order
+
+            with self._cond:
+                if generation != self._generation:
+                    continue
+                if self._priority:
+                    pos = self._priority.pop(0)
+                    if pos in self._order:
+                        self._order.remove(pos)
+                elif self._order:
+                    pos = self._order.pop(0)
+                else:
+                    continue
+
+            self._compute(scratch, base, pos)
+
+    def _compute(self, scratch, base, pos):
+        """Computes and caches the mouse reply to a wall on pos"""
+        index = scratch.index_of(pos)
+        if base.has_wall(index) or base.mouse == index:
+            return
+        after = base.with_wall(index, self.WALL_SCORE)
+        key = after.position()
+        if self.cache.get(key)[0]:
+            return
+
+        scratch.load_state(after)
+        step = scratch.ai_step()
+        self.cache.put(key, step)
+        PROFILER.count("ponder.replies")
@@ -0,0 +1,221 @@
+import csv
+import functools
+import json
+import os
+import time
+
+
+class Histogram:
+    """Wall-clock histogram with log-linear buckets in microseconds
+
+    Every power of two octave is split into SUB_BUCKETS equal buckets, so a
+    bucket is at most 1/SUB_BUCKETS of its value wide and percentiles
+    interpolated inside it stay within a few percent.
+    """
+    SUB_BITS = 4
+    SUB_BUCKETS = 1 << SUB_BITS
+
+    def __init__(self):
+        """Initialize an empty histogram"""
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.buckets = {}
+
+    @classmethod
+    def bucket_of(cls, micros):
+        """Returns the bucket index of a whole number of microseconds"""
+        shift = max(micros.bit_length() - cls.SUB_BITS - 1, 0)
+        return (shift << cls.SUB_BITS) + (micros >> shift)
+
+    @classmethod
+    def bucket_bounds(cls, bucket):
+        """Returns the (lower, upper) microseconds covered by a bucket"""
+        shift = max((bucket >> cls.SUB_BITS) - 1, 0)
+        sub = bucket - (shift << cls.SUB_BITS)
+        return sub << shift, (sub + 1) << shift
+
+    def add(self, seconds):
+        """Adds one measurement, in seconds"""
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+        bucket = self.bucket_of(int(seconds * 1_000_000))
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def mean(self):
+        """Returns the mean duration in seconds"""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q):
+        """Returns the q-th percentile in seconds, interpolated inside its bucket"""
+        if not self.count:
+            return 0.0
+
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            n = self.buckets[bucket]
+            if seen + n >= rank:
+                lower, upper = self.bucket_bounds(bucket)
+                micros = lower + (upper - lower) * max(rank - seen, 0) / n
+                return min(max(micros / 1_000_000, self.min), self.max)
+            seen += n
+        return self.max
+
+    def to_dict(self):
+        """Makes the histogram into a dictionary for exporting into json, buckets keyed by their lower bound"""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "min": self.min or 0.0,
+            "max": self.max,
+            "mean": self.mean(),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets_us": {str(self.bucket_bounds(b)[0]): n for b, n in sorted(self.buckets.items())},
+        }
+
+
+class Profiler:
+    """Call counters, timers and search stats for the engine and UI hot paths"""
+    ENV_VAR = "TTM_PROFILE"
+    EXPORT_DIR = "profiles"
+
+    def __init__(self, enabled=None):
+        """Initialize the profiler, enabled from the environment unless told otherwise"""
+        if enabled is None:
+            enabled = os.environ.get(self.ENV_VAR, "") not in ("", "0")
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        """Drops every recorded measurement"""
+        self.started = time.time()
+        self.counters = {}
+        self.timers = {}
+        self.searches = {}
+
+    def toggle(self):
+        """Switch profiling on or off"""
+        self.enabled = not self.enabled
+        return self.enabled
+
+    def count(self, name, n=1):
+        """Increments a call counter"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record_time(self, name, seconds):
+        """Adds a duration to the histogram of a timer"""
+        if not self.enabled:
+            return
+        histogram = self.timers.get(name)
+        if histogram is None:
+            histogram = self.timers[name] = Histogram()
+        histogram.add(seconds)
+
+    def record_search(self, name, nodes, max_open):
+        """Records the nodes expanded and the largest open list of a search"""
+        if not self.enabled:
+            return
+        stats = self.searches.get(name)
+        if stats is None:
+            stats = self.searches[name] = {
+                "searches": 0,
+                "nodes": 0,
+                "max_nodes": 0,
+                "max_open": 0,
+                "last_nodes": 0,
+                "last_open": 0,
+            }
+        stats["searches"] += 1
+        stats["nodes"] += nodes
+        stats["max_nodes"] = max(stats["max_nodes"], nodes)
+        stats["max_open"] = max(stats["max_open"], max_open)
+        stats["last_nodes"] = nodes
+        stats["last_open"] = max_open
+
+    def timed(self, name):
+        """Decorator counting and timing every call, a single flag check when disabled"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record_time(name, time.perf_counter() - start)
+                    self.count(name)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Returns every measurement as a dictionary"""
+        return {
+            "started": self.started,
+            "duration": time.time() - self.started,
+            "counters": dict(self.counters),
+            "timers": {name: h.to_dict() for name, h in self.timers.items()},
+            "searches": {name: dict(s) for name, s in self.searches.items()},
+        }
+
+    def overlay_lines(self):
+        """Returns short text lines for the live overlay"""
+        lines = []
+        for name in sorted(self.timers):
+            h = self.timers[name]
+            lines.append(
+                f"{name}: n={h.count} mean={h.mean() * 1000:.2f}ms p95={h.percentile(95) * 1000:.2f}ms"
+            )
+        for name in sorted(self.searches):
+            s = self.searches[name]
+            lines.append(f"{name}: nodes={s['last_nodes']} open={s['last_open']}")
+        for name in sorted(self.counters):
+            if name not in self.timers:
+                lines.append(f"{name}: {self.counters[name]}")
+        return lines
+
+    def export_json(self, path):
+        """Writes the session profile to a json file"""
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def export_csv(self, path):
+        """Writes the session profile to a csv file, one row per metric"""
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["kind", "name", "count", "total", "mean", "p50", "p95", "p99", "max"])
+            for name, h in sorted(self.timers.items()):
+                writer.writerow([
+                    "timer", name, h.count, h.total, h.mean(),
+                    h.percentile(50), h.percentile(95), h.percentile(99), h.max,
+                ])
+            for name, s in sorted(self.searches.items()):
+                mean = s["nodes"] / s["searches"] if s["searches"] else 0
+                writer.writerow([
+                    "search", name, s["searches"], s["nodes"], mean,
+                    "", "", "", s["max_nodes"],
+                ])
+            for name, n in sorted(self.counters.items()):
+                writer.writerow(["counter", name, n, "", "", "", "", "", ""])
+
+    def export(self, basename=None):
+        """Writes the session profile as both json and csv, returns the json path"""
+        if basename is None:
+            os.makedirs(self.EXPORT_DIR, exist_ok=True)
+            basename = os.path.join(self.EXPORT_DIR, time.strftime("profile_%Y%m%d_%H%M%S"))
+        self.export_json(basename + ".json")
+        self.export_csv(basename + ".csv")
+        return basename + ".json"
+
+
+PROFILER = Profiler()
@@ -0,0 +1,167 @@
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from BoardStyle import (
+    COLOR_BACKGROUND, COLOR_EMPTY, COLOR_MOUSE, COLOR_OUTLINE, COLOR_SHADOW, COLOR_WALL,
+    DOT_COLOR, hex_geometry,
+)
+from GameBoard import GameBoard
+from SelfPlay import board_at_start, generate, read_records, WALL_POLICIES
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:
+    Image = None
+    ImageDraw = None
+
+
+def _require_pillow():
+    """Raises when Pillow is missing"""
+    if Image is None:
+        raise RuntimeError("The renderer needs Pillow, install it with 'pip install pillow'")
+
+
+def render_state(state, geometry=None):
+    """Draws a BoardState into an in-memory image with the board colors"""
+    _require_pillow()
+    geometry = geometry or hex_geometry(size=GameBoard.SIZE)
+
+    image = Image.new("RGB", (geometry.width, geometry.height), COLOR_BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    for (row, col), polygon in geometry.polygons.items():
+        color = COLOR_WALL if state.walls >> (row * geometry.size + col) & 1 else COLOR_EMPTY
+        draw.polygon(geometry.shadows[(row, col)], fill=COLOR_SHADOW, outline=COLOR_OUTLINE, width=2)
+        draw.polygon(polygon, fill=color, outline=COLOR_OUTLINE, width=2)
+
+    cx, cy = geometry.centers[divmod(state.mouse, geometry.size)]
+    r = geometry.radius * 0.55
+    draw.ellipse((cx - r, cy - r, cx + r, cy + r), fill=COLOR_MOUSE, outline=DOT_COLOR)
+    return image
+
+
+def render_board(board, geometry=None):
+    """Draws a GameBoard into an in-memory image with the board colors"""
+    return render_state(board.to_state(), geometry or hex_geometry(size=board.SIZE))
+
+
+def replay(record):
+    """Yields a BoardState snapshot of a game record after every move, starting with the initial position"""
+    board = board_at_start(record)
+    yield board.to_state()
+    for kind, r, c in record.get("moves", ()):
+        if kind == "wall":
+            board.place_wall((r, c))
+        else:
+            board.mouse_pos = (r, c)
+            board.turn += 1
+        yield board.to_state()
+
+
+def render_frames(record, geometry=None):
+    """Returns one image per position of a game record"""
+    return [render_state(state, geometry) for state in replay(record)]
+
+
+def save_gif(frames, path, duration=400):
+    """Writes frames as an animated gif, holding the last frame longer"""
+    _require_pillow()
+    durations = [duration] * (len(frames) - 1) + [duration * 4]
+    frames[0].save(
+        path,
+        save_all=True,
+        append_images=frames[1:],
+        duration=durations,
+        loop=0,
+        optimize=False,
+    )
+
+
+def save_frames(frames, directory):
+    """Writes frames as numbered png files"""
+    os.makedirs(directory, exist_ok=True)
+    for i, frame in enumerate(frames):
+        frame.save(os.path.join(directory, f"frame_{i:04d}.png"))
+
+
+def export_record(record, path, as_frames=False, duration=400):
+    """Renders one game record to a gif, or to a directory of png frames, returns the path"""
+    frames = render_frames(record)
+    if as_frames:
+        save_frames(frames, path)
+    else:
+        save_gif(frames, path, duration)
+    return path
+
+
+def _export_job(job):
+    """Process pool entry point"""
+    record, path, as_frames, duration = job
+    return export_record(record, path, as_frames, duration)
+
+
+def export_many(records, directory, workers=None, as_frames=False, duration=400):
+    """Renders many game records in a process pool, yields the written paths
+
+    Only a few records per worker are in flight at a time, so record
+    streams of any length are rendered in constant memory.
+    """
+    _require_pillow()
+    os.makedirs(directory, exist_ok=True)
+
+    def jobs():
+        """Yields one job per record"""
+        for i, record in enumerate(records):
+            name = f"game_{i:06d}_{record.get('difficulty')}_{record.get('winner')}"
+            path = os.path.join(directory, name if as_frames else name + ".gif")
+            yield record, path, as_frames, duration
+
+    if workers == 1:
+        for job in jobs():
+            yield _export_job(job)
+        return
+
+    window = (workers or os.cpu_count() or 1) * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for job in jobs():
+            pending.append(pool.submit(_export_job, job))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main():
+    """Command line entry point for rendering recorded or simulated games"""
+    parser = argparse.ArgumentParser(description="Render games to animated gifs without a display")
+    parser.add_argument("records", nargs="*", help="json lines record files, .gz allowed")
+    parser.add_argument("--simulate", type=int, default=0, help="render this many self-play games instead")
+    parser.add_argument("--difficulty", nargs="*", default=["easy", "medium", "hard"])
+    parser.add_argument("--wall-policy", choices=sorted(WALL_POLICIES), default="near_mouse")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="renders")
+    parser.add_argument("--workers", type=int, default=None, help="processes, defaults to the cpu count")
+    parser.add_argument("--frames", action="store_true", help="write png frames instead of a gif")
+    parser.add_argument("--duration", type=int, default=400, help="milliseconds per frame")
+    args = parser.parse_args()
+
+    if Image is None:
+        parser.error("the renderer needs Pillow, install it with 'pip install pillow'")
+    if not args.records and not args.simulate:
+        parser.error("give record files or --simulate")
+
+    if args.simulate:
+        records = generate(args.difficulty, args.simulate, WALL_POLICIES[args.wall_policy], args.seed)
+    else:
+        records = read_records(args.records)
+
+    count = 0
+    for _ in export_many(records, args.out, args.workers, args.frames, args.duration):
+        count += 1
+    print(f"{count} games rendered to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
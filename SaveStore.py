@@ -0,0 +1,121 @@
+import json
+
+from GameBoard import GameBoard
+
+SAVE_FILE = "saves.json"
+
+
+def iter_saves(path=SAVE_FILE, chunk_size=65536):
+    """Yields (name, data) for every save, reading and decoding the file one entry at a time
+
+    The saves file is a single json object, so it is scanned incrementally
+    instead of being parsed whole: the first saves are available after
+    reading one chunk, however many saves the file holds.
+    """
+    decoder = json.JSONDecoder()
+    try:
+        f = open(path, "r")
+    except FileNotFoundError:
+        return
+
+    with f:
+        buf = ""
+        pos = 0
+        eof = False
+
+        def fill():
+            """Reads the next chunk, returns False at the end of the file"""
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            buf = buf[pos:] + chunk
+            pos = 0
+            return True
+
+        def next_char():
+            """Returns the next non whitespace character without consuming it, None at the end"""
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos].isspace():
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if eof or not fill():
+                    return None
+
+        def next_value():
+            """Decodes the next json value, reading more of the file when it is cut off"""
+            nonlocal pos
+            next_char()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof or not fill():
+                        raise
+                    continue
+                if end == len(buf) and not eof and fill():
+                    continue
+                pos = end
+                return value
+
+        try:
+            if next_char() != "{":
+                return
+            pos += 1
+            if next_char() == "}":
+                return
+
+            while True:
+                name = next_value()
+                if next_char() != ":":
+                    return
+                pos += 1
+                data = next_value()
+                yield name, data
+
+                separator = next_char()
+                if separator != ",":
+                    return
+                pos += 1
+        except json.JSONDecodeError:
+            return
+
+
+def wall_bits(walls, size=GameBoard.SIZE):
+    """Returns the walls of a save as a bitset of cell indices, 0 when they are malformed"""
+    bits = 0
+    try:
+        for r, c in walls:
+            if 0 <= r < size and 0 <= c < size:
+                bits |= 1 << (r * size + c)
+    except (TypeError, ValueError):
+        return 0
+    return bits
+
+
+def save_metadata(name, data):
+    """Returns the fields the saved games list shows, sorts on and draws the thumbnail from
+
+    The save itself is not kept, read_save reads it again when it is loaded.
+    """
+    mouse_pos = data.get("mouse_pos")
+    return {
+        "name": name,
+        "game_type": data.get("game_type"),
+        "difficulty": data.get("difficulty"),
+        "turn": data.get("turn", 0),
+        "score": data.get("score", 0),
+        "mouse_pos": tuple(mouse_pos) if isinstance(mouse_pos, list) else (-1, -1),
+        "walls": wall_bits(data.get("walls", ())),
+    }
+
+
+def read_save(name, path=SAVE_FILE):
+    """Returns the data of one save, None when it is missing"""
+    for saved, data in iter_saves(path):
+        if saved == name:
+            return data
+    return None
@@ -0,0 +1,213 @@
+import argparse
+import gzip
+import json
+import random
+import sys
+import time
+
+from GameBoard import GameBoard
+from PolicyTable import PolicyTable
+
+
+def seeded_board(game_type, difficulty, seed):
+    """Returns a GameBoard whose starting walls depend only on the seed"""
+    saved = random.getstate()
+    random.seed(seed)
+    try:
+        return GameBoard(game_type, difficulty)
+    finally:
+        random.setstate(saved)
+
+
+def legal_walls(board):
+    """Returns every cell a wall can be placed on, in a stable order"""
+    return sorted(board.legal_wall_moves())
+
+
+def random_wall(board, rng):
+    """Wall policy placing a wall on a random free cell"""
+    cells = legal_walls(board)
+    return rng.choice(cells) if cells else None
+
+
+def near_mouse_wall(board, rng):
+    """Wall policy placing a wall on a random free cell at most two rows and columns from the mouse"""
+    r, c = board.mouse_pos
+    cells = [
+        (r + dr, c + dc)
+        for dr in range(-2, 3)
+        for dc in range(-2, 3)
+        if board.is_legal_wall((r + dr, c + dc))
+    ]
+    return rng.choice(cells) if cells else random_wall(board, rng)
+
+
+def block_route_wall(board, rng):
+    """Wall policy blocking the first free cell of the mouse's shortest route to the margin"""
+    for cell in board.shortest_route():
+        if board.is_legal_wall(cell):
+            return cell
+    return near_mouse_wall(board, rng)
+
+
+WALL_POLICIES = {
+    "random": random_wall,
+    "near_mouse": near_mouse_wall,
+    "block_route": block_route_wall,
+}
+
+
+def live_ai(board):
+    """Mouse ai searching the move of the board's difficulty"""
+    return board.ai_step()
+
+
+def play_game(difficulty, wall_policy=near_mouse_wall, seed=None, mouse_ai=live_ai, policy_table=None):
+    """Plays a singleplayer game and returns its record
+
+    The record holds the starting position, every move as ["wall", r, c] or
+    ["mouse", r, c], the winner, turn count, final score and the time the
+    mouse ai spent searching each move. mouse_ai is called with the board
+    and returns the cell to move to, None to stay. A policy_table built for
+    these seeds answers the moves it holds without searching; those moves
+    are counted in table_moves and not timed.
+    """
+    rng = random.Random(seed)
+    board = seeded_board("singleplayer", difficulty, seed)
+    start = {
+        "mouse": list(board.mouse_pos),
+        "walls": sorted(list(w) for w in board.walls),
+    }
+    moves = []
+    ai_times = []
+    table_moves = 0
+    winner = None
+
+    while winner is None:
+        pos = wall_policy(board, rng)
+        if pos is None or not board.place_wall(pos):
+            winner = "mouse"
+            break
+        moves.append(["wall", pos[0], pos[1]])
+
+        before = board.mouse_pos
+        board.save_state()
+        found = False
+        if policy_table is not None:
+            found, step = board.policy_step(policy_table)
+        if found:
+            table_moves += 1
+        else:
+            started = time.perf_counter()
+            step = mouse_ai(board)
+            ai_times.append(time.perf_counter() - started)
+        if step is not None:
+            board.mouse_pos = step
+        board.turn += 1
+
+        if board.mouse_pos != before:
+            moves.append(["mouse", board.mouse_pos[0], board.mouse_pos[1]])
+
+        if board.mouse_escaped():
+            winner = "mouse"
+        elif board.mouse_trapped():
+            winner = "walls"
+
+    return {
+        "seed": seed,
+        "difficulty": difficulty,
+        "winner": winner,
+        "turns": board.turn,
+        "score": board.score,
+        "start": start,
+        "moves": moves,
+        "ai_times": ai_times,
+        "table_moves": table_moves,
+    }
+
+
+def _open(path, mode):
+    """Opens a record file, gzip compressed when it ends in .gz"""
+    if path == "-":
+        return sys.stdin if "r" in mode else sys.stdout
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t")
+    return open(path, mode)
+
+
+def write_records(path, records):
+    """Writes game records as json lines, one game per line, returns the count"""
+    count = 0
+    f = _open(path, "w")
+    try:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")))
+            f.write("\n")
+            count += 1
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    return count
+
+
+def read_records(paths):
+    """Yields game records from json lines files one at a time, skipping broken lines"""
+    for path in paths:
+        f = _open(path, "r")
+        try:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+def board_at_start(record):
+    """Returns a GameBoard set to the starting position of a record"""
+    board = GameBoard.from_dict({
+        "game_type": "singleplayer",
+        "difficulty": record["difficulty"],
+        "turn": 0,
+        "current_player": "walls",
+        "mouse_pos": record["start"]["mouse"],
+        "walls": record["start"]["walls"],
+        "score": 20000,
+    })
+    return board
+
+
+def generate(difficulties, games, wall_policy, seed=0, policy_dir=None):
+    """Yields self-play records, round robin over the difficulties, replaying from the policy tables of policy_dir"""
+    for i in range(games):
+        difficulty = difficulties[i % len(difficulties)]
+        table = None
+        if policy_dir is not None:
+            table = PolicyTable.for_difficulty(policy_dir, difficulty, GameBoard.AI_VERSION, GameBoard.SIZE)
+        yield play_game(difficulty, wall_policy, seed + i, policy_table=table)
+
+
+def main():
+    """Command line entry point for recording self-play games"""
+    parser = argparse.ArgumentParser(description="Record self-play games as json lines")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--difficulty", nargs="*", default=["easy", "medium", "hard"])
+    parser.add_argument("--wall-policy", choices=sorted(WALL_POLICIES), default="near_mouse")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="-", help="output file, .gz to compress, - for stdout")
+    parser.add_argument("--policy-dir", default=None, help="replay moves from the policy tables built for these seeds")
+    args = parser.parse_args()
+
+    records = generate(args.difficulty, args.games, WALL_POLICIES[args.wall_policy], args.seed, args.policy_dir)
+    count = write_records(args.out, records)
+    if args.out != "-":
+        print(f"{count} games written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,525 @@
+import argparse
+import json
+import sys
+
+from BoardState import BoardState
+from GameBoard import GameBoard
+from SelfPlay import seeded_board
+
+INF = 10 ** 9
+PROVEN = (0, INF)
+DISPROVEN = (INF, 0)
+
+OR = 0
+AND = 1
+
+
+class SearchBudgetExceeded(Exception):
+    """Raised when a proof search runs out of its node budget"""
+
+
+class Solver:
+    """Depth-first proof-number search proving whether the wall player wins a position
+
+    Positions are (kind, mouse index, wall bitset) tuples, OR nodes have the
+    wall player to move and AND nodes the mouse. Against a mouse ai the
+    mouse reply is a single forced move, so the tree only has OR nodes;
+    against the optimal mouse every mouse move is an AND child.
+
+    Walls only matter inside the region of free cells the mouse can reach,
+    which never grows. A region without a margin cell is a win, and the
+    wall player only branches over the cells of the region; against a mouse
+    ai one wall outside it stands in for all the others.
+
+    Against the optimal mouse an extra wall never helps the mouse, so every
+    disproof keeps the zone of cells its escapes run through: walls outside
+    the zone leave it disproved, and a wall outside the zone of a refuted
+    sibling is refuted as well.
+    """
+
+    def __init__(self, difficulty=None, max_nodes=500_000, max_entries=2_000_000):
+        """Initialize the solver, difficulty None means an optimal mouse"""
+        self.difficulty = difficulty
+        self.max_nodes = max_nodes
+        self.max_entries = max_entries
+        self.table = {}
+        self.replies = {}
+        self.regions = {}
+        self.initials = {}
+        self.zones = {}
+        self.nodes = 0
+
+        self._board = GameBoard.from_state(BoardState(0, 0, 0, 0, "walls"), "singleplayer", difficulty)
+        size = GameBoard.SIZE
+        self._neighbors = []
+        self._neighbor_bits = []
+        self._density_bits = []
+        self._edge = 0
+        self._distance = []
+        for index in range(size * size):
+            pos = self._board.pos_of(index)
+            self._neighbors.append([self._board.index_of(n) for n in self._board.get_neighbors(pos)])
+            self._neighbor_bits.append(sum(1 << n for n in self._neighbors[index]))
+            r, c = pos
+            self._density_bits.append(sum(
+                1 << self._board.index_of((r + dr, c + dc))
+                for dr in range(-2, 3)
+                for dc in range(-2, 3)
+                if self._board.is_inside_board((r + dr, c + dc))
+            ))
+            if self._board.mouse_escaped_pos(pos):
+                self._edge |= 1 << index
+        for a in range(size * size):
+            pa = self._board.pos_of(a)
+            self._distance.append(
+                [self._board.hex_distance(pa, self._board.pos_of(b)) for b in range(size * size)]
+            )
+        self._cells = size * size
+        self._all = (1 << self._cells) - 1
+
+    def mode(self):
+        """Returns the name of the mouse the solver plays against"""
+        return self.difficulty or "optimal"
+
+    def solve(self, board):
+        """Proves a wall-to-move board, returns a result dictionary
+
+        result is "win" when the wall player wins with perfect play, "loss"
+        when it can not, or "unknown" when the node budget ran out. Reading
+        the proof tree back gets a budget of its own; when that runs out too
+        the result still stands and proof_size is only a lower bound, marked
+        by proof_exact.
+        """
+        state = board.to_state()
+        root = (OR, state.mouse, state.walls)
+        self.nodes = 0
+
+        try:
+            self._mid(root, INF, INF)
+        except SearchBudgetExceeded:
+            return {
+                "result": "unknown", "first_wall": None, "proof_size": 0, "proof_exact": False, "nodes": self.nodes,
+            }
+        won = self._lookup(root)[0] == 0
+        searched = self.nodes
+
+        # reading the proof back searches evicted nodes again, on a budget of its own
+        self.nodes = 0
+        first = None
+        seen = set()
+        exact = True
+        try:
+            if won:
+                first, _ = self._deciding_child(root, 0)
+            size = self._tree_size(root, seen)
+        except SearchBudgetExceeded:
+            size = len(seen)
+            exact = False
+
+        return {
+            "result": "win" if won else "loss",
+            "first_wall": list(self._board.pos_of(first)) if first is not None else None,
+            "proof_size": size,
+            "proof_exact": exact,
+            "nodes": searched + self.nodes,
+        }
+
+    def _free_neighbors(self, mouse, walls):
+        """Returns the free neighbor indices of a cell"""
+        return [n for n in self._neighbors[mouse] if not (walls >> n) & 1]
+
+    def _reply(self, mouse, walls):
+        """Returns the cell index the mouse ai moves to, None if it stays"""
+        key = (mouse, walls)
+        if key in self.replies:
+            return self.replies[key]
+        if len(self.replies) >= self.max_entries:
+            self.replies.clear()
+
+        self._board.load_state(BoardState(mouse, walls, 0, 0, "walls"))
+        step = self._board.ai_step()
+        index = None if step is None else self._board.index_of(step)
+        self.replies[key] = index
+        return index
+
+    def _region(self, mouse, walls):
+        """Returns the bitset of free cells the mouse can reach, its own cell included"""
+        key = (mouse, walls)
+        region = self.regions.get(key)
+        if region is not None:
+            return region
+        if len(self.regions) >= self.max_entries:
+            self.regions.clear()
+
+        region = frontier = 1 << mouse
+        while frontier:
+            low = frontier & -frontier
+            frontier ^= low
+            grown = self._neighbor_bits[low.bit_length() - 1] & ~walls & ~region
+            region |= grown
+            frontier |= grown
+        self.regions[key] = region
+        return region
+
+    def _wall_cells(self, mouse, walls):
+        """Returns the cells worth a wall, sorted nearest to the mouse first
+
+        The optimal mouse only gets cells of its region, more walls never
+        help it. A mouse ai also gets one cell outside the region standing
+        in for every wall its moves can not see, the hard ai sees walls two
+        rows and columns around the cells it searches.
+        """
+        region = self._region(mouse, walls)
+        cells = region & ~(1 << mouse)
+        if self.difficulty is not None:
+            seen = region
+            if self.difficulty == "hard":
+                rest = region
+                while rest:
+                    low = rest & -rest
+                    rest ^= low
+                    seen |= self._density_bits[low.bit_length() - 1]
+            cells |= seen & ~walls & ~(1 << mouse)
+            outside = ((1 << self._cells) - 1) & ~walls & ~seen
+            cells |= outside & -outside
+
+        indices = []
+        while cells:
+            low = cells & -cells
+            indices.append(low.bit_length() - 1)
+            cells ^= low
+        indices.sort(key=self._distance[mouse].__getitem__)
+        return indices
+
+    def _lookup(self, node):
+        """Returns the proof and disproof numbers of a node"""
+        entry = self.table.get(node)
+        if entry is not None:
+            return entry
+        entry = self.initials.get(node)
+        if entry is None:
+            if len(self.initials) >= self.max_entries:
+                self.initials.clear()
+            entry = self.initials[node] = self._initial(node)
+        return entry
+
+    def _initial(self, node):
+        """Returns the terminal value or the heuristic numbers of an unexpanded node"""
+        kind, mouse, walls = node
+        free = self._free_neighbors(mouse, walls)
+        if not free:
+            return PROVEN
+
+        if kind == AND:
+            if any((self._edge >> n) & 1 for n in free):
+                return DISPROVEN
+            if not self._region(mouse, walls) & self._edge:
+                return PROVEN
+            return len(free), 1
+
+        if self.difficulty is None:
+            exits = sum(1 for n in free if (self._edge >> n) & 1)
+            if exits >= 2:
+                return DISPROVEN
+        if not self._region(mouse, walls) & self._edge:
+            return PROVEN
+        return len(free), 1 + self._edge_distance(mouse)
+
+    def _edge_distance(self, mouse):
+        """Returns the distance from a cell to the margin, ignoring walls"""
+        r, c = self._board.pos_of(mouse)
+        return min(r, c, GameBoard.SIZE - 1 - r, GameBoard.SIZE - 1 - c)
+
+    def _store(self, node, value):
+        """Stores a node in the transposition table, evicting unsolved entries when full"""
+        if len(self.table) >= self.max_entries and node not in self.table:
+            self.table = {k: v for k, v in self.table.items() if v[0] == 0 or v[1] == 0}
+            if len(self.table) >= self.max_entries:
+                self.table.clear()
+        self.table[node] = value
+
+    def _children(self, node):
+        """Returns the child nodes, each a (move index, child node or terminal value) pair"""
+        kind, mouse, walls = node
+        free = self._free_neighbors(mouse, walls)
+
+        if kind == AND:
+            return [(n, (OR, n, walls)) for n in free]
+
+        exits = [n for n in free if (self._edge >> n) & 1]
+        if self.difficulty is None and len(exits) == 1:
+            cells = exits
+        else:
+            cells = self._wall_cells(mouse, walls)
+
+        if self.difficulty is None:
+            children = [(cell, (AND, mouse, walls | (1 << cell))) for cell in cells]
+            return self._narrowed(children, [self._value(child) for _, child in children])[0]
+
+        children = []
+        for cell in cells:
+            after = walls | (1 << cell)
+            if not self._free_neighbors(mouse, after):
+                children.append((cell, PROVEN))
+                continue
+            step = self._reply(mouse, after)
+            if step is None:
+                children.append((cell, PROVEN))
+            elif (self._edge >> step) & 1:
+                children.append((cell, DISPROVEN))
+            else:
+                children.append((cell, (OR, step, after)))
+        return children
+
+    def _narrowed(self, children, values):
+        """Drops the walls of an optimal mouse OR node that a refuted sibling already refutes, returns (children, values)
+
+        When a wall loses, placing another one outside the zone of that
+        refutation instead leaves fewer walls than a position the same
+        escape wins, so it loses too.
+        """
+        zone = self._all
+        for (_, child), value in zip(children, values):
+            if value[1] == 0:
+                zone &= self._zone(child)
+        if zone == self._all:
+            return children, values
+        kept = [
+            i for i, ((move, _), value) in enumerate(zip(children, values))
+            if value[1] == 0 or (zone >> move) & 1
+        ]
+        return [children[i] for i in kept], [values[i] for i in kept]
+
+    def _zone(self, node):
+        """Returns the cells the escape from a disproved node runs through, every cell when it is not known"""
+        zone = self.zones.get(node)
+        if zone is not None:
+            return zone
+        kind, mouse, walls = node
+        exits = [n for n in self._free_neighbors(mouse, walls) if (self._edge >> n) & 1]
+        if kind == AND and exits:
+            return (1 << mouse) | (1 << exits[0])
+        if kind == OR and len(exits) >= 2:
+            return (1 << mouse) | (1 << exits[0]) | (1 << exits[1])
+        return self._all
+
+    def _store_zone(self, node, children, values):
+        """Stores the zone of a node the optimal mouse was just shown to escape from"""
+        kind, mouse, walls = node
+        zone = 1 << mouse
+        if kind == AND:
+            for (move, child), value in zip(children, values):
+                if value[1] == 0:
+                    zone |= (1 << move) | self._zone(child)
+                    break
+        else:
+            for _, child in children:
+                zone |= self._zone(child)
+            # a lone exit left open is where the mouse goes after any other wall
+            exits = [n for n in self._free_neighbors(mouse, walls) if (self._edge >> n) & 1]
+            if len(exits) == 1:
+                zone |= 1 << exits[0]
+        if len(self.zones) >= self.max_entries:
+            self.zones.clear()
+        self.zones[node] = zone
+
+    def _value(self, child):
+        """Returns the numbers of a child, which may be a terminal value"""
+        if len(child) == 3:
+            return self._lookup(child)
+        return child
+
+    def _mid(self, node, th_pn, th_dn):
+        """Multiple iterative deepening step of df-pn"""
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise SearchBudgetExceeded()
+
+        pn, dn = self._lookup(node)
+        if pn == 0 or dn == 0:
+            self._store(node, (pn, dn))
+            return
+        if pn >= th_pn or dn >= th_dn:
+            return
+
+        children = self._children(node)
+        kind = node[0]
+        narrow = kind == OR and self.difficulty is None
+        while True:
+            values = [self._value(child) for _, child in children]
+            if narrow:
+                children, values = self._narrowed(children, values)
+            if kind == OR:
+                pn = min(v[0] for v in values)
+                dn = min(INF, sum(v[1] for v in values))
+            else:
+                pn = min(INF, sum(v[0] for v in values))
+                dn = min(v[1] for v in values)
+            self._store(node, (pn, dn))
+            if dn == 0 and self.difficulty is None:
+                self._store_zone(node, children, values)
+            if pn >= th_pn or dn >= th_dn:
+                return
+
+            axis = 0 if kind == OR else 1
+            best = None
+            second = INF
+            for i, v in enumerate(values):
+                if best is None or v[axis] < values[best][axis]:
+                    if best is not None:
+                        second = min(second, values[best][axis])
+                    best = i
+                else:
+                    second = min(second, v[axis])
+
+            child = children[best][1]
+            c_pn, c_dn = values[best]
+            if kind == OR:
+                self._mid(child, min(th_pn, second + 1), th_dn - dn + c_dn)
+            else:
+                self._mid(child, th_pn - pn + c_pn, min(th_dn, second + 1))
+
+    def _deciding_child(self, node, axis):
+        """Returns (move, child) of the child deciding a solved node, axis 0 for proofs and 1 for disproofs"""
+        children = self._children(node)
+        for move, child in children:
+            if self._value(child)[axis] == 0:
+                return move, child
+        for move, child in children:
+            if self._solved(child)[axis] == 0:
+                return move, child
+        return None, None
+
+    def _solved(self, child):
+        """Returns the numbers of a child, searching it again if it was evicted"""
+        value = self._value(child)
+        if value[0] != 0 and value[1] != 0 and len(child) == 3:
+            self._mid(child, INF, INF)
+            value = self._value(child)
+        return value
+
+    def _tree_size(self, node, seen):
+        """Returns the number of distinct nodes in the proof or disproof tree of a node"""
+        if node in seen:
+            return 0
+        seen.add(node)
+        if self._initial(node) in (PROVEN, DISPROVEN):
+            return 1
+        pn, dn = self._solved(node)
+
+        proven = pn == 0
+        if (node[0] == OR) == proven:
+            _, child = self._deciding_child(node, 0 if proven else 1)
+            children = [child] if child is not None else []
+        else:
+            children = [child for _, child in self._children(node)]
+
+        total = 1
+        for child in children:
+            total += self._tree_size(child, seen) if len(child) == 3 else 1
+        return total
+
+
+class SolvedCache:
+    """Solver results saved on disk keyed by position and mouse"""
+    CACHE_FILE = "solved.json"
+
+    def __init__(self, path=None):
+        """Initialize the cache from its json file"""
+        self.path = path or self.CACHE_FILE
+        self.results = self._load()
+        self.dirty = False
+
+    def key(self, board, mode):
+        """Returns the cache key of a board solved against a mouse"""
+        state = board.to_state()
+        return f"{mode}:{GameBoard.AI_VERSION}:{board.SIZE}:{state.mouse}:{state.walls:x}"
+
+    def get(self, key):
+        """Returns a cached result or None"""
+        return self.results.get(key)
+
+    def put(self, key, result):
+        """Caches a solved result, unknown results are not cached"""
+        if result["result"] != "unknown":
+            self.results[key] = result
+            self.dirty = True
+
+    def _load(self):
+        """Reader from the json"""
+        try:
+            with open(self.path, "r") as f:
+                content = f.read().strip()
+                if not content:
+                    return {}
+                return json.loads(content)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save(self):
+        """Writes the cache to json when it changed"""
+        if self.dirty:
+            with open(self.path, "w") as f:
+                json.dump(self.results, f, indent=2)
+            self.dirty = False
+
+
+def solve(board, difficulty=None, cache=None, solver=None):
+    """Solves a board against the mouse ai of a difficulty, or the optimal mouse when None"""
+    solver = solver or Solver(difficulty)
+    key = cache.key(board, solver.mode()) if cache is not None else None
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    if board.mouse_escaped():
+        result = {"result": "loss", "first_wall": None, "proof_size": 1, "proof_exact": True, "nodes": 0}
+    else:
+        result = solver.solve(board)
+    if cache is not None:
+        cache.put(key, result)
+    return result
+
+
+def solve_many(boards, difficulty=None, cache=None, max_nodes=500_000):
+    """Yields (board, result) for many boards, sharing one solver and cache"""
+    solver = Solver(difficulty, max_nodes=max_nodes)
+    for board in boards:
+        yield board, solve(board, difficulty, cache, solver)
+
+
+def main():
+    """Command line entry point for solving starting positions in batch"""
+    parser = argparse.ArgumentParser(description="Prove whether wall player wins starting positions")
+    parser.add_argument("--difficulty", default="hard", help="difficulty of the starting walls")
+    parser.add_argument("--mouse", default="optimal", help="optimal, or the difficulty of the mouse ai")
+    parser.add_argument("--boards", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--saves", default=None, help="solve the wall-turn games of a saves file instead")
+    parser.add_argument("--max-nodes", type=int, default=500_000)
+    parser.add_argument("--cache", default=SolvedCache.CACHE_FILE)
+    args = parser.parse_args()
+
+    if args.saves:
+        with open(args.saves) as f:
+            saves = json.load(f)
+        boards = [
+            GameBoard.from_dict(data) for data in saves.values()
+            if data["game_type"] == "singleplayer" and data["current_player"] == "walls"
+        ]
+    else:
+        boards = [seeded_board("singleplayer", args.difficulty, args.seed + i) for i in range(args.boards)]
+
+    difficulty = None if args.mouse == "optimal" else args.mouse
+    cache = SolvedCache(args.cache)
+    try:
+        for board, result in solve_many(boards, difficulty, cache, args.max_nodes):
+            print(json.dumps({"mouse": list(board.mouse_pos), "walls": len(board.walls), **result}))
+            sys.stdout.flush()
+    finally:
+        cache.save()
+
+
+if __name__ == "__main__":
+    main()
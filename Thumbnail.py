@@ -0,0 +1,120 @@
+import base64
+import queue
+import struct
+import threading
+import zlib
+
+from BoardStyle import COLOR_BACKGROUND, COLOR_EMPTY, COLOR_MOUSE, COLOR_WALL
+from GameBoard import GameBoard
+
+CELL = 6
+MARGIN = 2
+
+
+def _rgb(color):
+    """Returns the bytes of a #rrggbb color"""
+    return bytes.fromhex(color[1:])
+
+
+def _chunk(tag, data):
+    """Returns a png chunk"""
+    return (
+        struct.pack(">I", len(data))
+        + tag
+        + data
+        + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+    )
+
+
+def encode_png(width, height, pixels):
+    """Encodes packed rgb pixels as png bytes"""
+    stride = width * 3
+    raw = b"".join(b"\x00" + bytes(pixels[y * stride:(y + 1) * stride]) for y in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + _chunk(b"IDAT", zlib.compress(raw))
+        + _chunk(b"IEND", b"")
+    )
+
+
+def render_thumbnail(mouse_pos, walls):
+    """Renders a mouse cell and a wall bitset as a small png, offset rows like the hex board"""
+    size = GameBoard.SIZE
+    width = 2 * MARGIN + size * CELL + CELL // 2
+    height = 2 * MARGIN + size * (CELL - 1) + 1
+    pixels = bytearray(_rgb(COLOR_BACKGROUND) * (width * height))
+
+    mouse = tuple(mouse_pos)
+    empty = _rgb(COLOR_EMPTY)
+    wall = _rgb(COLOR_WALL)
+    mouse_color = _rgb(COLOR_MOUSE)
+
+    for r in range(size):
+        for c in range(size):
+            cell = (r, c)
+            color = mouse_color if cell == mouse else wall if walls >> (r * size + c) & 1 else empty
+            x0 = MARGIN + c * CELL + (CELL // 2 if r % 2 == 1 else 0)
+            y0 = MARGIN + r * (CELL - 1)
+            for y in range(y0, y0 + CELL - 1):
+                start = (y * width + x0) * 3
+                pixels[start:start + (CELL - 1) * 3] = color * (CELL - 1)
+
+    return encode_png(width, height, pixels)
+
+
+class ThumbnailWorker:
+    """Background thread rendering thumbnails, newest requests first
+
+    Tk images can only be created on the main thread, so the worker hands
+    back base64 png data that the caller turns into a PhotoImage.
+    """
+
+    def __init__(self):
+        """Initialize and start the worker thread"""
+        self._requests = queue.LifoQueue()
+        self._results = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="thumbnails", daemon=True)
+        self._thread.start()
+
+    def request(self, key, mouse_pos, walls):
+        """Asks for the thumbnail of a save, ignored when it is already queued"""
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self._requests.put((key, mouse_pos, walls))
+
+    def results(self):
+        """Yields (key, base64 png) for every finished thumbnail"""
+        while True:
+            try:
+                key, png = self._results.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                self._pending.discard(key)
+            yield key, png
+
+    def _run(self):
+        """Worker loop"""
+        while True:
+            key, mouse_pos, walls = self._requests.get()
+            try:
+                png = base64.b64encode(render_thumbnail(mouse_pos, walls))
+            except (TypeError, ValueError):
+                png = None
+            self._results.put((key, png))
+
+
+_worker = None
+
+
+def worker():
+    """Returns the shared thumbnail worker, starting it on first use"""
+    global _worker
+    if _worker is None:
+        _worker = ThumbnailWorker()
+    return _worker
@@ -0,0 +1,223 @@
+import argparse
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from SelfPlay import WALL_POLICIES, play_game
+
+MOUSE_AIS = {
+    "greedy": "greedy_step",
+    "bfs": "bfs_step",
+    "astar": "astar_step",
+}
+
+
+def mouse_ai(name):
+    """Returns the mouse ai callable of a name"""
+    method = MOUSE_AIS[name]
+    return lambda board: getattr(board, method)()
+
+
+def play_pair(job):
+    """Plays the candidate and the baseline on the same seeded start, returns the candidate's score
+
+    In the mouse role both mouse ais face the same wall policy, in the
+    walls role both wall policies face the same mouse ai. The score is 1
+    when only the candidate wins, 0 when only the baseline wins and 0.5
+    otherwise.
+    """
+    role, candidate, baseline, opponent, difficulty, seed = job
+    wins = []
+    for variant in (candidate, baseline):
+        if role == "mouse":
+            record = play_game(difficulty, WALL_POLICIES[opponent], seed, mouse_ai(variant))
+        else:
+            record = play_game(difficulty, WALL_POLICIES[variant], seed, mouse_ai(opponent))
+        wins.append(record["winner"] == role)
+
+    if wins[0] == wins[1]:
+        return 0.5
+    return 1.0 if wins[0] else 0.0
+
+
+def elo_from_score(score):
+    """Returns the Elo difference of an expected score"""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def score_from_elo(elo):
+    """Returns the expected score of an Elo difference"""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+class MatchResult:
+    """Running paired results of a candidate against a baseline, with Elo and an SPRT"""
+
+    def __init__(self, elo0=0.0, elo1=20.0, alpha=0.05, beta=0.05, min_pairs=20):
+        """Initialize an empty match testing H0: elo <= elo0 against H1: elo >= elo1 after min_pairs pairs"""
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.min_pairs = min_pairs
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.pairs = 0
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def add(self, score):
+        """Adds the score of one pair"""
+        self.pairs += 1
+        self.total += score
+        self.total_sq += score * score
+        if score == 1.0:
+            self.wins += 1
+        elif score == 0.0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    def mean(self):
+        """Returns the mean pair score"""
+        return self.total / self.pairs if self.pairs else 0.5
+
+    def variance(self):
+        """Returns the variance of the pair scores"""
+        if not self.pairs:
+            return 0.0
+        mean = self.mean()
+        return max(self.total_sq / self.pairs - mean * mean, 0.0)
+
+    def elo(self):
+        """Returns the estimated Elo difference"""
+        return elo_from_score(self.mean())
+
+    def confidence_interval(self, z=1.96):
+        """Returns the Elo confidence interval of the estimate"""
+        if self.pairs < 2:
+            return -math.inf, math.inf
+        margin = z * math.sqrt(self.variance() / self.pairs)
+        return elo_from_score(self.mean() - margin), elo_from_score(self.mean() + margin)
+
+    def llr(self):
+        """Returns the log likelihood ratio of H1 against H0, normal approximation of the GSPRT"""
+        if not self.pairs:
+            return 0.0
+        # half a win and half a loss keep the variance positive while every pair is drawn
+        count = self.pairs + 1
+        mean = (self.total + 0.5) / count
+        variance = (self.total_sq + 0.5) / count - mean * mean
+        s0 = score_from_elo(self.elo0)
+        s1 = score_from_elo(self.elo1)
+        return count * (s1 - s0) * (2 * mean - s0 - s1) / (2 * variance)
+
+    def verdict(self):
+        """Returns "H1" or "H0" once the SPRT accepts a hypothesis, None while it is undecided"""
+        if self.pairs < self.min_pairs:
+            return None
+        llr = self.llr()
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+    def to_dict(self):
+        """Makes the result into a dictionary"""
+        low, high = self.confidence_interval()
+        return {
+            "pairs": self.pairs,
+            "wins": self.wins,
+            "draws": self.draws,
+            "losses": self.losses,
+            "score": self.mean(),
+            "elo": self.elo(),
+            "elo_ci": [low, high],
+            "llr": self.llr(),
+            "bounds": [self.lower, self.upper],
+            "min_pairs": self.min_pairs,
+            "verdict": self.verdict(),
+        }
+
+
+def run_match(role, candidate, baseline, opponent, difficulty="hard", seed=0,
+              max_pairs=2000, workers=None, result=None):
+    """Plays paired games until the SPRT decides or max_pairs is reached, returns the MatchResult
+
+    Pairs are handed to a process pool a few at a time and folded in seed
+    order, so a given seed range always gives the same result.
+    """
+    result = result or MatchResult()
+    jobs = ((role, candidate, baseline, opponent, difficulty, seed + i) for i in range(max_pairs))
+
+    if workers == 1:
+        for job in jobs:
+            result.add(play_pair(job))
+            if result.verdict():
+                break
+        return result
+
+    window = (workers or os.cpu_count() or 1) * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(play_pair, job))
+            if len(pending) < window:
+                continue
+            result.add(pending.popleft().result())
+            if result.verdict():
+                break
+        else:
+            while pending and not result.verdict():
+                result.add(pending.popleft().result())
+        for future in pending:
+            future.cancel()
+    return result
+
+
+def main():
+    """Command line entry point for AI tournaments"""
+    parser = argparse.ArgumentParser(description="Compare AI variants on paired seeded games")
+    parser.add_argument("--role", choices=("mouse", "walls"), default="mouse")
+    parser.add_argument("--candidate", nargs="+", required=True, help="variants tested against the baseline")
+    parser.add_argument("--baseline", required=True)
+    parser.add_argument("--opponent", required=True, help="wall policy in the mouse role, mouse ai in the walls role")
+    parser.add_argument("--difficulty", default="hard", help="difficulty of the starting walls")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-pairs", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=20.0)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--min-pairs", type=int, default=20, help="pairs played before the SPRT may stop")
+    args = parser.parse_args()
+
+    variants = MOUSE_AIS if args.role == "mouse" else WALL_POLICIES
+    opponents = WALL_POLICIES if args.role == "mouse" else MOUSE_AIS
+    for name in args.candidate + [args.baseline]:
+        if name not in variants:
+            parser.error(f"unknown {args.role} variant {name!r}, choose from {sorted(variants)}")
+    if args.opponent not in opponents:
+        parser.error(f"unknown opponent {args.opponent!r}, choose from {sorted(opponents)}")
+
+    for candidate in args.candidate:
+        result = run_match(
+            args.role, candidate, args.baseline, args.opponent, args.difficulty, args.seed,
+            args.max_pairs, args.workers, MatchResult(args.elo0, args.elo1, args.alpha, args.beta, args.min_pairs),
+        )
+        stats = result.to_dict()
+        low, high = stats["elo_ci"]
+        print(
+            f"{candidate} vs {args.baseline}: {stats['wins']}W {stats['draws']}D {stats['losses']}L "
+            f"in {stats['pairs']} pairs, elo {stats['elo']:+.1f} [{low:+.1f}, {high:+.1f}], "
+            f"llr {stats['llr']:.2f} ({stats['verdict'] or 'undecided'})"
+        )
+
+
+if __name__ == "__main__":
+    main()
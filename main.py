@@ -1,9 +1,14 @@
+import heapq
 import tkinter as tk
+from collections import OrderedDict
+from itertools import islice
 from tkinter import ttk
 
+import Thumbnail
 from GameBoard import GameBoard
 from GameBoardUI import GameBoardUI
-import json
+from Profiler import PROFILER
+from SaveStore import SAVE_FILE, iter_saves, read_save, save_metadata
 
 
 class TrapTheMouseApp(tk.Tk):
@@ -88,27 +93,67 @@ class MainMenu(tk.Frame):
 
 
 class SavedGamesMenu(tk.Frame):
-    """Saved games menu"""
-    SAVE_FILE = "saves.json"
+    """Saved games menu, a virtualized list that only builds widgets for the visible rows"""
+    SAVE_FILE = SAVE_FILE
+    ROW_HEIGHT = 72
+    LIST_WIDTH = 560
+    LIST_HEIGHT = 380
+    PAGE_SIZE = 200
+    PAGE_MARGIN = 50
+    THUMBNAIL_POLL = 40
+    SORTS = ("Saved order", "Name", "Turn", "Score")
+
+    _thumbnails = OrderedDict()
+    THUMBNAIL_CACHE = 2000
 
     def __init__(self, master):
-        """Initialize the main menu frame"""
+        """Initialize the saved games menu frame"""
         super().__init__(master)
+        self.entries = []
+        self.view = []
+        self.rows = []
+        self._exhausted = False
+        self._page_job = None
 
         ttk.Label(self, text="Saved Games", font=("Arial", 18, "bold")).pack(pady=20)
 
-        saves = self._load_all_saves()
-
-        if not saves:
-            ttk.Label(self, text="No saved games found.").pack(pady=10)
-        else:
-            for name in saves:
-                ttk.Button(
-                    self,
-                    text=name,
-                    width=30,
-                    command=lambda n=name: self._load_save(n)
-                ).pack(pady=5)
+        controls = ttk.Frame(self)
+        controls.pack(pady=5)
+        ttk.Label(controls, text="Filter:").pack(side="left", padx=5)
+        self.filter_text = tk.StringVar()
+        self.filter_text.trace_add("write", lambda *args: self._update_view())
+        ttk.Entry(controls, textvariable=self.filter_text, width=25).pack(side="left", padx=5)
+        ttk.Label(controls, text="Sort:").pack(side="left", padx=5)
+        self.sort_by = tk.StringVar(value=self.SORTS[0])
+        sort_box = ttk.Combobox(
+            controls,
+            textvariable=self.sort_by,
+            values=self.SORTS,
+            state="readonly",
+            width=12
+        )
+        sort_box.pack(side="left", padx=5)
+        sort_box.bind("<<ComboboxSelected>>", lambda event: self._update_view())
+
+        list_frame = ttk.Frame(self)
+        list_frame.pack(pady=5)
+        self.canvas = tk.Canvas(
+            list_frame,
+            width=self.LIST_WIDTH,
+            height=self.LIST_HEIGHT,
+            highlightthickness=0
+        )
+        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=lambda first, last: self._on_scroll(scrollbar, first, last))
+        self.canvas.pack(side="left")
+        scrollbar.pack(side="right", fill="y")
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Button-4>", lambda event: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda event: self.canvas.yview_scroll(1, "units"))
+        self.canvas.configure(yscrollincrement=self.ROW_HEIGHT // 3)
+
+        self.empty_label = ttk.Label(self, text="")
+        self.empty_label.pack()
 
         ttk.Button(
             self,
@@ -117,25 +162,157 @@ class SavedGamesMenu(tk.Frame):
             command=master.show_main_menu
         ).pack(pady=20)
 
-    def _load_all_saves(self):
-        """Load all saves from json file"""
-        try:
-            with open(self.SAVE_FILE, "r") as f:
-                content = f.read().strip()
-                if not content:
-                    return {}
-                return json.loads(content)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
-
-    def _load_save(self, name):
-        """Load saves from json file"""
-        saves = self._load_all_saves()
-        data = saves.get(name)
-
-        if not data:
+        self.rows = [self._build_row() for _ in range(self.LIST_HEIGHT // self.ROW_HEIGHT + 2)]
+        self.thumbnails = Thumbnail.worker()
+        self._blank = tk.PhotoImage(width=1, height=1)
+        self._reader = iter_saves(self.SAVE_FILE)
+        self._poll_job = None
+        self._load_page()
+        self._poll_thumbnails()
+
+    def destroy(self):
+        """Cancels the pending page loads and thumbnail polls and closes the saves file before destroying the frame"""
+        for job in (self._page_job, self._poll_job):
+            if job is not None:
+                self.after_cancel(job)
+        self._reader.close()
+        super().destroy()
+
+    def _build_row(self):
+        """Builds one reusable row of the list, hidden until it is bound to a save"""
+        row = ttk.Frame(self.canvas, width=self.LIST_WIDTH, height=self.ROW_HEIGHT)
+        row.thumbnail = ttk.Label(row)
+        row.thumbnail.pack(side="left", padx=8)
+        row.button = ttk.Button(row, width=24)
+        row.button.pack(side="left", padx=8)
+        row.details = ttk.Label(row)
+        row.details.pack(side="left", padx=8)
+        row.window = self.canvas.create_window(0, 0, window=row, anchor="nw", state="hidden")
+        row.entry = None
+        return row
+
+    def _load_page(self):
+        """Reads the next page of saves and adds it to the view"""
+        self._page_job = None
+        page = [save_metadata(name, data) for name, data in islice(self._reader, self.PAGE_SIZE)]
+        if len(page) < self.PAGE_SIZE:
+            self._exhausted = True
+        self.entries.extend(page)
+
+        matches = self._filtered(page)
+        order = self._sort_order()
+        if order is None:
+            self.view.extend(matches)
+        else:
+            key, reverse = order
+            matches.sort(key=key, reverse=reverse)
+            self.view = list(heapq.merge(self.view, matches, key=key, reverse=reverse))
+        self._show_view()
+
+        if self._exhausted and not self.entries:
+            self.empty_label.config(text="No saved games found.")
+
+    def _filtered(self, entries):
+        """Returns the saves whose name contains the filter text"""
+        needle = self.filter_text.get().strip().casefold()
+        return [e for e in entries if needle in e["name"].casefold()] if needle else list(entries)
+
+    def _sort_order(self):
+        """Returns the (key, reverse) of the chosen sort, None for the saved order"""
+        sort = self.sort_by.get()
+        if sort == "Name":
+            return lambda e: e["name"].casefold(), False
+        if sort == "Turn":
+            return lambda e: e["turn"], True
+        if sort == "Score":
+            return lambda e: e["score"], True
+        return None
+
+    def _update_view(self):
+        """Applies the name filter and the sort order to the loaded saves"""
+        view = self._filtered(self.entries)
+        order = self._sort_order()
+        if order is not None:
+            key, reverse = order
+            view.sort(key=key, reverse=reverse)
+        self.view = view
+        self._show_view()
+
+    def _show_view(self):
+        """Resizes the list to the view and rebinds the rows"""
+        self.canvas.configure(scrollregion=(0, 0, self.LIST_WIDTH, max(1, len(self.view)) * self.ROW_HEIGHT))
+        self._refresh_rows()
+
+    def _want_page(self):
+        """Schedules the next page when the list nears the end of the view, or the sort needs every save"""
+        if self._exhausted or self._page_job is not None:
+            return
+        last = int(self.canvas.canvasy(self.LIST_HEIGHT) // self.ROW_HEIGHT)
+        if self._sort_order() is not None or last + self.PAGE_MARGIN >= len(self.view):
+            self._page_job = self.after(1, self._load_page)
+
+    def _on_scroll(self, scrollbar, first, last):
+        """Keeps the scrollbar in sync and rebinds the rows to the visible saves"""
+        scrollbar.set(first, last)
+        self._refresh_rows()
+
+    def _on_wheel(self, event):
+        """Event handler for the mouse wheel"""
+        self.canvas.yview_scroll(-1 if event.delta > 0 else 1, "units")
+
+    def _refresh_rows(self):
+        """Moves the pooled rows under the visible part of the list"""
+        first = int(self.canvas.canvasy(0) // self.ROW_HEIGHT)
+        for i, row in enumerate(self.rows):
+            index = first + i
+            if index >= len(self.view):
+                row.entry = None
+                self.canvas.itemconfigure(row.window, state="hidden")
+                continue
+
+            entry = self.view[index]
+            self.canvas.coords(row.window, 0, index * self.ROW_HEIGHT)
+            self.canvas.itemconfigure(row.window, state="normal")
+            if row.entry is not entry:
+                row.entry = entry
+                row.button.config(text=entry["name"], command=lambda e=entry: self._load_save(e))
+                row.details.config(
+                    text=f"{entry['game_type']} {entry['difficulty'] or ''}\n"
+                         f"Turn {entry['turn']}  Score {entry['score']}"
+                )
+            row.thumbnail.config(image=self._thumbnail(entry))
+        self._want_page()
+
+    def _thumbnail(self, entry):
+        """Returns the cached thumbnail of a save, asking the worker for it on a miss"""
+        key = entry["name"], entry["mouse_pos"], entry["walls"]
+        image = self._thumbnails.get(key)
+        if image is not None:
+            self._thumbnails.move_to_end(key)
+            return image
+        self.thumbnails.request(key, entry["mouse_pos"], entry["walls"])
+        return self._blank
+
+    def _poll_thumbnails(self):
+        """Turns the rendered thumbnails into images on the Tk thread"""
+        updated = False
+        for key, png in self.thumbnails.results():
+            if png is None:
+                continue
+            self._thumbnails[key] = tk.PhotoImage(data=png)
+            while len(self._thumbnails) > self.THUMBNAIL_CACHE:
+                self._thumbnails.popitem(last=False)
+            updated = True
+        if updated:
+            self._refresh_rows()
+        self._poll_job = self.after(self.THUMBNAIL_POLL, self._poll_thumbnails)
+
+    def _load_save(self, entry):
+        """Load a save into the game board, read again from the saves file"""
+        data = read_save(entry["name"], self.SAVE_FILE)
+        if data is None:
+            self.empty_label.config(text=f"Save {entry['name']} could not be read.")
             return
-
         board = GameBoard.from_dict(data)
         self.master.load_game(board)
 
@@ -205,3 +382,6 @@ class LoseScene(tk.Frame):
 if __name__ == "__main__":
     app = TrapTheMouseApp()
     app.mainloop()
+
+    if PROFILER.enabled:
+        PROFILER.export()